@@ -0,0 +1,135 @@
+"""
+Benchmark of encoding the snapshots of the figures of a cell on several
+threads.
+
+A cell creating many separate figures, e.g. a grid of small multiples, is
+simulated without a front-end: the figures are created, and
+``flush_figures`` renders them and encodes their snapshots at the end of the
+cell, as the ``post_execute`` hook of the kernel does. The figures are
+rendered on the kernel thread, the snapshots are encoded on
+``render_workers`` threads. This is repeated for every number of workers,
+and the time and speed-up compared to encoding the snapshots one at a time
+are reported.
+
+Usage::
+
+    python benchmarks/flush_figures.py                 # 50 figures
+    python benchmarks/flush_figures.py --figures 100 --workers 1 2 4 8
+    python benchmarks/flush_figures.py --save scaling.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import matplotlib
+
+matplotlib.use('module://ipympl.backend_nbagg')
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+import ipympl  # noqa: E402
+from ipympl import backend_nbagg  # noqa: E402
+from ipympl.backend_nbagg import _Backend_ipympl, flush_figures  # noqa: E402
+
+
+def make_figures(count, points):
+    """Create the figures of a cell, as plt.figure does in interactive mode."""
+    rng = np.random.default_rng(0)
+    figures = []
+    for i in range(count):
+        fig, ax = plt.subplots(figsize=(4, 3), dpi=100)
+        x = np.linspace(0, 10, points)
+        ax.plot(x, np.sin(x + i) + rng.normal(0, 0.1, points))
+        ax.scatter(x[::10], np.cos(x[::10] + i), s=5)
+        ax.set_title(f'Panel {i}')
+        fig.canvas.draw_idle()
+        figures.append(fig)
+
+    _Backend_ipympl._to_show = list(figures)
+    _Backend_ipympl._draw_called = True
+    return figures
+
+
+def run(count, points, workers, repeat):
+    """Return the fastest time of ``repeat`` runs of flush_figures."""
+    times = []
+    for _ in range(repeat):
+        figures = make_figures(count, points)
+        try:
+            with patch.object(backend_nbagg, 'render_workers', workers):
+                with patch('ipympl.backend_nbagg.display'):
+                    start = time.perf_counter()
+                    flush_figures()
+                    times.append(time.perf_counter() - start)
+        finally:
+            for fig in figures:
+                plt.close(fig)
+    return min(times)
+
+
+def metadata():
+    return {
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'ipympl': ipympl.__version__,
+        'matplotlib': matplotlib.__version__,
+        'numpy': np.__version__,
+    }
+
+
+def main(argv=None):
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument(
+        '--figures', type=int, default=50, help='Figures created by the cell'
+    )
+    parser.add_argument(
+        '--points', type=int, default=1000, help='Points plotted per figure'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        nargs='+',
+        default=sorted({1, 2, 4, cpus}),
+        help='Numbers of render_workers to measure (default: 1 2 4 and the CPUs)',
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=3, help='Runs per measure, the fastest is kept'
+    )
+    parser.add_argument('--save', metavar='FILE', help='Save the results as JSON')
+    args = parser.parse_args(argv)
+
+    print(f'{args.figures} figures on {cpus} CPUs')
+    print(f'{"workers":>7} {"total ms":>9} {"ms/figure":>10} {"speed-up":>9}')
+    results = {}
+    serial = run(args.figures, args.points, 0, args.repeat)
+    for workers in args.workers:
+        elapsed = run(args.figures, args.points, workers, args.repeat)
+        results[workers] = {
+            'ms': 1000 * elapsed,
+            'ms_per_figure': 1000 * elapsed / args.figures,
+            'speedup': serial / elapsed,
+        }
+        result = results[workers]
+        print(
+            f'{workers:>7} {result["ms"]:>9.0f} {result["ms_per_figure"]:>10.1f} '
+            f'{result["speedup"]:>8.2f}x'
+        )
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'metadata': metadata(), 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,304 @@
+"""
+Benchmark of the render -> encode -> send pipeline of the ipympl Canvas.
+
+The canvas is driven headlessly: ``send`` is replaced by a fake front-end
+which answers the draw requests of the kernel, as the browser would, and the
+interactions are sent as the front-end messages. No browser is needed.
+
+Each scenario combines a figure size, a device pixel ratio, an image mode
+(``diff`` frames, or ``full`` frames every time), a number of artists and an
+interaction, and reports the time, bytes and comm messages per frame sent,
+and the peak memory traced by ``tracemalloc``.
+
+Usage::
+
+    python benchmarks/pipeline.py                       # run everything
+    python benchmarks/pipeline.py -k large-dpr2         # only some scenarios
+    python benchmarks/pipeline.py --save baseline.json  # save a baseline
+    python benchmarks/pipeline.py --compare baseline.json
+
+``--compare`` exits with a non-zero status when a scenario regressed by more
+than ``--threshold``.
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import matplotlib
+
+matplotlib.use('module://ipympl.backend_nbagg')
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import PIL  # noqa: E402
+
+import ipympl  # noqa: E402
+
+FIGSIZES = {'small': (6.4, 4.8), 'large': (12, 9)}
+DEVICE_PIXEL_RATIOS = [1, 2]
+IMAGE_MODES = ['diff', 'full']
+ARTISTS = [10, 200]
+INTERACTIONS = ['update', 'pan', 'zoom', 'resize']
+
+# Metrics compared against a baseline: a higher value is a regression
+METRICS = ['ms_per_frame', 'bytes_per_frame', 'messages_per_frame', 'peak_kib']
+
+
+class FakeFrontend:
+    """
+    Stands in for the browser: counts the comm messages sent by the kernel,
+    and requests a frame when the kernel asks for a draw.
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.draw_requested = False
+        self.messages = 0
+        canvas.send = self.send
+        # Only the state updates get there, the other messages go to send
+        canvas._send = self.update
+        canvas.manager.web_sockets = [canvas]
+        canvas._handle_message(canvas, {'type': 'initialized'}, [])
+
+    def send(self, content, buffers=None):
+        self.messages += 1
+        # Older kernels JSON-encode the messages in 'data'
+        msg = json.loads(content['data']) if 'data' in content else content
+        batch = msg['messages'] if msg['type'] == 'batch' else [msg]
+        if any(msg['type'] == 'draw' for msg in batch):
+            self.draw_requested = True
+
+    def update(self, msg, buffers=None):
+        self.messages += 1
+
+    def message(self, content):
+        self.canvas._handle_message(self.canvas, content, [])
+        self.flush()
+
+    def flush(self):
+        while self.draw_requested:
+            self.draw_requested = False
+            self.canvas._handle_message(self.canvas, {'type': 'draw'}, [])
+
+    def mouse(self, event_type, x, y, button=0, buttons=0):
+        self.message(
+            {
+                'type': event_type,
+                'x': x,
+                'y': y,
+                'button': button,
+                'buttons': buttons,
+                'modifiers': [],
+            }
+        )
+
+
+def make_figure(figsize, dpr, artists):
+    fig, ax = plt.subplots(figsize=FIGSIZES[figsize], dpi=100)
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 10, 100)
+    lines = [
+        ax.plot(x, np.sin(x + phase) + rng.normal(0, 0.1, x.size))[0]
+        for phase in np.linspace(0, np.pi, artists)
+    ]
+    ax.set_title('ipympl benchmark')
+
+    frontend = FakeFrontend(fig.canvas)
+    if dpr != 1:
+        frontend.message({'type': 'set_device_pixel_ratio', 'device_pixel_ratio': dpr})
+    frontend.message({'type': 'refresh'})
+    return fig, lines, frontend
+
+
+def axes_center(fig):
+    # Front-end coordinates: pixels from the top left corner
+    x0, y0, width, height = fig.axes[0].bbox.bounds
+    return x0 + width / 2, fig.bbox.height - (y0 + height / 2)
+
+
+def interact(interaction, fig, lines, frontend, frames):
+    """Run ``frames`` steps of an interaction, each of them sending a frame."""
+    canvas = fig.canvas
+    if interaction == 'update':
+        for i in range(frames):
+            lines[0].set_ydata(np.cos(lines[0].get_xdata() + i / 10))
+            canvas.draw_idle()
+            frontend.flush()
+
+    elif interaction == 'pan':
+        canvas.toolbar.pan()
+        x, y = axes_center(fig)
+        frontend.mouse('button_press', x, y, buttons=1)
+        for i in range(frames):
+            frontend.mouse('motion_notify', x + 3 * (i + 1), y + 2 * (i + 1), buttons=1)
+        frontend.mouse('button_release', x + 3 * frames, y + 2 * frames)
+        canvas.toolbar.pan()
+
+    elif interaction == 'zoom':
+        canvas.toolbar.zoom()
+        x, y = axes_center(fig)
+        for i in range(frames):
+            frontend.mouse('button_press', x - 40, y - 30, buttons=1)
+            frontend.mouse('motion_notify', x + 40, y + 30, buttons=1)
+            frontend.mouse('button_release', x + 40, y + 30)
+        canvas.toolbar.zoom()
+
+    elif interaction == 'resize':
+        width, height = fig.bbox.size / canvas.device_pixel_ratio
+        for i in range(frames):
+            step = 10 * (i % 2 * 2 - 1)
+            frontend.message(
+                {'type': 'resize', 'width': width + step, 'height': height + step}
+            )
+
+    else:
+        raise ValueError(f'Unknown interaction {interaction!r}')
+
+
+def run_scenario(figsize, dpr, mode, artists, interaction, frames):
+    fig, lines, frontend = make_figure(figsize, dpr, artists)
+    canvas = fig.canvas
+
+    if mode == 'full':
+        # Every frame is a complete image
+        get_diff_image = canvas.get_diff_image
+
+        def get_full_image():
+            canvas._force_full = True
+            return get_diff_image()
+
+        canvas.get_diff_image = get_full_image
+
+    try:
+        # Warm up, so that caches and the first full frame are not measured
+        interact(interaction, fig, lines, frontend, 2)
+
+        before = canvas.stats
+        messages = frontend.messages
+        start = time.perf_counter()
+        interact(interaction, fig, lines, frontend, frames)
+        elapsed = time.perf_counter() - start
+        after = canvas.stats
+        messages = frontend.messages - messages
+
+        tracemalloc.start()
+        interact(interaction, fig, lines, frontend, min(frames, 3))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        plt.close(fig)
+
+    sent = after['frames']['sent'] - before['frames']['sent']
+    sent_bytes = after['bytes_sent'] - before['bytes_sent']
+    return {
+        'frames': sent,
+        'ms_per_frame': 1000 * elapsed / max(sent, 1),
+        'bytes_per_frame': sent_bytes / max(sent, 1),
+        'messages_per_frame': messages / max(sent, 1),
+        'peak_kib': peak / 1024,
+    }
+
+
+def scenarios(keywords):
+    for figsize, dpr, mode, artists, interaction in itertools.product(
+        FIGSIZES, DEVICE_PIXEL_RATIOS, IMAGE_MODES, ARTISTS, INTERACTIONS
+    ):
+        name = f'{figsize}-dpr{dpr}-{mode}-{artists}artists-{interaction}'
+        if all(keyword in name for keyword in keywords):
+            yield name, (figsize, dpr, mode, artists, interaction)
+
+
+def metadata():
+    return {
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'ipympl': ipympl.__version__,
+        'matplotlib': matplotlib.__version__,
+        'numpy': np.__version__,
+        'pillow': PIL.__version__,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print the change of every metric, return the regressed scenarios."""
+    regressions = []
+    print(f'\nCompared to the baseline of {baseline["metadata"]["date"]}:')
+    for name, result in results.items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            print(f'{name:<45} not in the baseline')
+            continue
+        changes = []
+        for metric in METRICS:
+            if metric not in reference:
+                continue
+            change = result[metric] / max(reference[metric], 1e-9) - 1
+            changes.append(f'{metric} {change:+7.1%}')
+            if change > threshold:
+                regressions.append((name, metric, change))
+        print(f'{name:<45} ' + '  '.join(changes))
+
+    for name, metric, change in regressions:
+        print(f'REGRESSION {name}: {metric} {change:+.1%}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument(
+        '-k',
+        dest='keywords',
+        action='append',
+        default=[],
+        help='Only run the scenarios whose name contains this, can be repeated',
+    )
+    parser.add_argument(
+        '--frames', type=int, default=10, help='Frames measured per scenario'
+    )
+    parser.add_argument('--save', metavar='FILE', help='Save the results as JSON')
+    parser.add_argument(
+        '--compare', metavar='FILE', help='Compare the results to a saved baseline'
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.1,
+        help='Relative increase reported as a regression (default: 0.1)',
+    )
+    args = parser.parse_args(argv)
+
+    results = {}
+    print(
+        f'{"scenario":<45} {"frames":>6} {"ms/frame":>9} {"bytes/frame":>12} '
+        f'{"msgs/frame":>10} {"peak KiB":>9}'
+    )
+    for name, params in scenarios(args.keywords):
+        result = run_scenario(*params, frames=args.frames)
+        results[name] = result
+        print(
+            f'{name:<45} {result["frames"]:>6} {result["ms_per_frame"]:>9.1f} '
+            f'{result["bytes_per_frame"]:>12.0f} '
+            f'{result["messages_per_frame"]:>10.1f} {result["peak_kib"]:>9.0f}'
+        )
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'metadata': metadata(), 'results': results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
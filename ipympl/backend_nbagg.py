@@ -16,10 +16,16 @@ try:
 except ModuleNotFoundError:
     pass
 
+import asyncio
 import io
-import json
+import time
+import zlib
 from base64 import b64encode
-from threading import Lock
+from collections import Counter, defaultdict, deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from threading import RLock, local
+from weakref import WeakSet, WeakValueDictionary
 
 try:
     from collections.abc import Iterable
@@ -36,13 +42,13 @@ from ipywidgets import DOMWidget, widget_serialization
 from matplotlib import is_interactive, rcParams
 from matplotlib._pylab_helpers import Gcf
 from matplotlib.backend_bases import NavigationToolbar2, _Backend, cursors
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.backends.backend_webagg_core import (
     FigureCanvasWebAggCore,
     FigureManagerWebAgg,
     NavigationToolbar2WebAgg,
     TimerTornado,
 )
-from PIL import Image
 from traitlets import (
     Any,
     Bool,
@@ -52,14 +58,19 @@ from traitlets import (
     Float,
     Instance,
     List,
+    TraitError,
     Tuple,
     Unicode,
     default,
     observe,
+    validate,
 )
 
 from ._version import js_semver
 
+# PIL, hashlib and the thread pool of the encoder are imported where they are
+# used, as importing the backend is part of the start-up time of the kernels
+
 # Workaround for thread-safety issues in matplotlib's mathtext parser.
 # The _mathtext.Parser singleton has mutable state (_state_stack, etc.) that is
 # not protected against concurrent access from multiple threads. When ipympl is
@@ -67,20 +78,38 @@ from ._version import js_semver
 # routing), concurrent calls to the parser can corrupt this state, leading to
 # ParseException errors like 'Expected end of text, found "$"'.
 # See https://github.com/matplotlib/ipympl/issues/610
+# Each thread gets its own parser, so that they do not share that state.
+# Parses still run one at a time: matplotlib enables the pyparsing packrat
+# cache, which holds a global lock for a whole parse. Parse results are cached
+# by MathTextParser for the expression, font properties (which hold the
+# fontset and size) and dpi, and we keep more of them, as tick labels like
+# $10^{3}$ are parsed again on every draw.
+_mathtext_cache_size = 1024
+
 try:
     import functools
 
     from matplotlib._mathtext import Parser as _MathTextInternalParser
+    from matplotlib.mathtext import MathTextParser
+
+    _mathtext_parsers = local()
 
-    _mathtext_parse_lock = Lock()
-    _original_mathtext_parse = _MathTextInternalParser.parse
+    class _ThreadLocalMathTextParser:
+        """Descriptor returning a ``_mathtext.Parser`` per thread."""
+
+        def __get__(self, instance, owner=None):
+            try:
+                return _mathtext_parsers.parser
+            except AttributeError:
+                _mathtext_parsers.parser = _MathTextInternalParser()
+                return _mathtext_parsers.parser
 
-    @functools.wraps(_original_mathtext_parse)
-    def _thread_safe_mathtext_parse(self, *args, **kwargs):
-        with _mathtext_parse_lock:
-            return _original_mathtext_parse(self, *args, **kwargs)
+    MathTextParser._parser = _ThreadLocalMathTextParser()
 
-    _MathTextInternalParser.parse = _thread_safe_mathtext_parse
+    _original_parse_cached = MathTextParser._parse_cached.__wrapped__
+    MathTextParser._parse_cached = functools.lru_cache(_mathtext_cache_size)(
+        _original_parse_cached
+    )
 except Exception:
     pass
 
@@ -92,9 +121,597 @@ cursors_str = {
     cursors.WAIT: 'wait',
 }
 
-# threading.Lock to prevent multiple threads from accessing globals such as Gcf
-_lock = Lock()
 
+class _InstrumentedLock:
+    """
+    Reentrant lock keeping track of how long threads wait for it and hold it.
+
+    Only the outermost acquisition of a thread is measured.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._depth = 0
+        self._acquired_at = 0
+        self._stats = Counter()
+
+    def __enter__(self):
+        start = time.perf_counter()
+        contended = not self._lock.acquire(blocking=False)
+        if contended:
+            self._lock.acquire()
+        if self._depth == 0:
+            self._acquired_at = time.perf_counter()
+            wait = (self._acquired_at - start) * 1000
+            self._stats['acquisitions'] += 1
+            self._stats['contended'] += contended
+            self._stats['wait_ms'] += wait
+            self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], wait)
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0:
+            hold = (time.perf_counter() - self._acquired_at) * 1000
+            self._stats['hold_ms'] += hold
+            self._stats['max_hold_ms'] = max(self._stats['max_hold_ms'], hold)
+        self._lock.release()
+
+    def stats(self):
+        """
+        Return the number of acquisitions, how many had to wait for another
+        thread, and the total and max wait and hold times in ms.
+        """
+        return {
+            name: self._stats[name]
+            for name in (
+                'acquisitions',
+                'contended',
+                'wait_ms',
+                'max_wait_ms',
+                'hold_ms',
+                'max_hold_ms',
+            )
+        }
+
+
+# Lock to prevent multiple threads from accessing globals such as Gcf and the
+# figures to show. Displaying a figure only holds the lock of its manager.
+_gcf_lock = _InstrumentedLock()
+# Kept for backwards compatibility
+_lock = _gcf_lock
+
+# Codecs for the image frames sent to the front-end: MIME type, and whether
+# the codec keeps the alpha channel (which is needed for diff frames).
+_image_codecs = {
+    'png': ('image/png', True),
+    'png-palette': ('image/png', True),
+    'jpeg': ('image/jpeg', False),
+    'webp': ('image/webp', True),
+    'raw-zlib': ('application/x-ipympl-rgba-zlib', True),
+}
+
+
+# The _data_url of a figure whose snapshot is the same as the one of another
+# figure is this prefix followed by the model id of the other figure
+_data_url_ref = 'ipympl-ref:'
+# The figure holding each snapshot in its _data_url, by digest
+_state_images = WeakValueDictionary()
+
+
+# Number of samples kept for the rolling performance statistics
+_stats_window = 100
+
+# Timings reported by the front-end along with its draw requests
+_frontend_timings = ('decode_ms', 'paint_ms', 'round_trip_ms', 'event_round_trip_ms')
+
+# Events that only matter for their latest state, merged while they wait to be
+# dispatched
+_coalesced_events = ('motion_notify', 'scroll')
+
+# Resizing is considered over once no resize message came for this long, in s
+_resize_settle_time = 0.25
+
+
+def _summarize(samples):
+    """Return the count, mean, max and last value of rolling samples."""
+    if not samples:
+        return {'count': 0, 'mean': None, 'max': None, 'last': None}
+    return {
+        'count': len(samples),
+        'mean': sum(samples) / len(samples),
+        'max': max(samples),
+        'last': samples[-1],
+    }
+
+
+# Thread pool encoding the frames of the canvases with threaded_encoding,
+# created on first use
+_encoder = None
+
+
+def _get_encoder():
+    global _encoder
+    if _encoder is None:
+        from concurrent.futures import ThreadPoolExecutor
+
+        _encoder = ThreadPoolExecutor(thread_name_prefix='ipympl-encoder')
+    return _encoder
+
+
+# Number of threads encoding the snapshots of the figures rendered at the end
+# of a cell execution, see flush_figures. 0 or 1 encodes them one at a time.
+render_workers = 0
+# The thread pool encoding them, and its number of threads
+_render_pool = (0, None)
+
+
+def _get_render_pool():
+    global _render_pool
+    workers, pool = _render_pool
+    if workers != render_workers:
+        from concurrent.futures import ThreadPoolExecutor
+
+        if pool is not None:
+            pool.shutdown(wait=False)
+        pool = ThreadPoolExecutor(render_workers, thread_name_prefix='ipympl-render')
+        _render_pool = (render_workers, pool)
+    return pool
+
+
+def _running_loop():
+    """Return the running event loop, or None."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _call_later(delay, callback):
+    """
+    Call ``callback`` in ``delay`` seconds on the running event loop.
+
+    Returns the ``asyncio.TimerHandle``, or None if there is no running loop
+    (e.g. outside of a kernel), in which case nothing is scheduled.
+    """
+    loop = _running_loop()
+    if loop is None:
+        return None
+    return loop.call_later(delay, callback)
+
+
+def _encode_image(data, codec='png', quality=85, compression=6):
+    """
+    Encode an RGBA image.
+
+    Parameters
+    ----------
+    data : (height, width, 4) uint8 array
+    codec : str
+        One of the ``_image_codecs`` names.
+    quality : int
+        Quality of the lossy codecs (jpeg and webp), from 0 to 100.
+    compression : int
+        zlib compression level of the png and raw-zlib codecs, from 0 to 9.
+
+    Returns
+    -------
+    bytes
+        The encoded image, which has the ``_image_codecs[codec]`` MIME type.
+    """
+    if codec == 'raw-zlib':
+        return zlib.compress(np.ascontiguousarray(data).tobytes(), compression)
+
+    from PIL import Image
+
+    image = Image.fromarray(data)
+    with io.BytesIO() as buf:
+        if codec == 'png':
+            image.save(buf, format='png', compress_level=compression)
+        elif codec == 'png-palette':
+            # Fast octree is the only built-in method supporting RGBA images
+            quantize = getattr(Image, 'Quantize', Image)
+            image = image.quantize(colors=256, method=quantize.FASTOCTREE)
+            image.save(buf, format='png', compress_level=compression)
+        elif codec == 'jpeg':
+            image.convert('RGB').save(buf, format='jpeg', quality=quality)
+        elif codec == 'webp':
+            image.save(buf, format='webp', quality=quality)
+        else:
+            raise ValueError(f'Unknown image codec {codec!r}')
+        return buf.getvalue()
+
+
+def _encode_tiles(tiles, codec, quality, compression):
+    """Encode (height, width) uint32 RGBA tiles with ``_encode_image``."""
+    return [
+        _encode_image(
+            tile.view(dtype=np.uint8).reshape((*tile.shape, 4)),
+            codec,
+            quality,
+            compression,
+        )
+        for tile in tiles
+    ]
+
+
+def _changed_regions(mask, tile_size=64, max_regions=16):
+    """
+    Return the regions covering the changed pixels of a diff frame.
+
+    The changed tiles of a ``tile_size`` grid are merged into horizontal runs,
+    and runs spanning the same columns on consecutive rows of tiles are
+    merged together. Each region is then shrunk to the changed pixels it
+    contains.
+
+    Parameters
+    ----------
+    mask : (height, width) bool array
+        The pixels that changed since the last frame.
+    tile_size : int
+        Size of the tiles, in pixels.
+    max_regions : int
+        Above this number of regions, a single region covering all the
+        changes is returned, as every region has an encoding overhead.
+
+    Returns
+    -------
+    list of (x, y, width, height)
+    """
+    height, width = mask.shape
+    grid = np.logical_or.reduceat(mask, np.arange(0, height, tile_size), axis=0)
+    grid = np.logical_or.reduceat(grid, np.arange(0, width, tile_size), axis=1)
+
+    # [x0, x1, y0, y1] in tiles
+    tiles = []
+    previous_runs = {}
+    for row, changed in enumerate(grid):
+        edges = np.diff(np.concatenate(([0], changed.view(np.int8), [0])))
+        runs = {}
+        for x0, x1 in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+            region = previous_runs.get((x0, x1))
+            if region is None:
+                region = [x0, x1, row, row + 1]
+                tiles.append(region)
+            else:
+                region[3] = row + 1
+            runs[(x0, x1)] = region
+        previous_runs = runs
+
+    if len(tiles) > max_regions:
+        x0 = min(region[0] for region in tiles)
+        x1 = max(region[1] for region in tiles)
+        y0 = min(region[2] for region in tiles)
+        y1 = max(region[3] for region in tiles)
+        tiles = [[x0, x1, y0, y1]]
+
+    regions = []
+    for x0, x1, y0, y1 in tiles:
+        x0, x1 = x0 * tile_size, min(x1 * tile_size, width)
+        y0, y1 = y0 * tile_size, min(y1 * tile_size, height)
+        region = mask[y0:y1, x0:x1]
+        rows = np.flatnonzero(region.any(axis=1))
+        cols = np.flatnonzero(region.any(axis=0))
+        regions.append(
+            (
+                int(x0 + cols[0]),
+                int(y0 + rows[0]),
+                int(cols[-1] - cols[0] + 1),
+                int(rows[-1] - rows[0] + 1),
+            )
+        )
+    return regions
+
+
+def _can_merge_events(first, second):
+    """Whether the second motion or scroll event supersedes the first one."""
+    return all(
+        first.get(key) == second.get(key)
+        for key in ('type', 'client_id', 'buttons', 'modifiers')
+    )
+
+
+def _format_lock_stats(name, stats):
+    return (
+        '{}: {} acquisitions, {} contended; wait {:.1f} ms (max {:.1f} ms), '
+        'hold {:.1f} ms (max {:.1f} ms)'.format(
+            name,
+            stats['acquisitions'],
+            stats['contended'],
+            stats['wait_ms'],
+            stats['max_wait_ms'],
+            stats['hold_ms'],
+            stats['max_hold_ms'],
+        )
+    )
+
+
+class _BufferBudget:
+    """
+    Memory budget for the Agg renderers and frame buffers of the canvases.
+
+    The buffers of a canvas are released once all its front-ends are closed
+    or scrolled out of view, or, least recently used first, while all the
+    buffers take more than ``max_bytes``. Set ``idle_timeout`` to also
+    release them once the canvas was not used for that many seconds, even
+    while it is displayed. The canvas rebuilds them on its next draw, or
+    when its Agg buffer is read. Set ``max_bytes`` or ``idle_timeout`` to 0
+    to disable the limit.
+    """
+
+    def __init__(self, max_bytes=512 * 1024**2, idle_timeout=0):
+        self.max_bytes = max_bytes
+        self.idle_timeout = idle_timeout
+        self._canvases = WeakSet()
+        self._lock = RLock()
+        self._stats = Counter()
+
+    def touch(self, canvas):
+        """Record that the canvas was drawn, and enforce the budget."""
+        canvas._last_used = time.monotonic()
+        with self._lock:
+            self._canvases.add(canvas)
+        self.enforce(keep=canvas)
+
+    def enforce(self, keep=None):
+        """Release the buffers of the canvases that are over the budget."""
+        now = time.monotonic()
+        with self._lock:
+            canvases = list(self._canvases)
+            total = sum(canvas._buffer_bytes() for canvas in canvases)
+            for canvas in sorted(canvases, key=lambda canvas: canvas._last_used):
+                if canvas is keep or not canvas._can_release_buffers():
+                    continue
+                idle = now - canvas._last_used
+                if (
+                    canvas._is_out_of_view()
+                    or (self.idle_timeout and idle > self.idle_timeout)
+                    or (self.max_bytes and total > self.max_bytes)
+                ):
+                    reclaimed = canvas._release_buffers()
+                    total -= reclaimed
+                    self._stats['released'] += 1
+                    self._stats['reclaimed_bytes'] += reclaimed
+
+    def info(self):
+        """
+        Return the memory taken by the buffers of the canvases, and how many
+        times buffers were released and how much memory it reclaimed.
+        """
+        with self._lock:
+            canvases = list(self._canvases)
+            return {
+                'canvases': len(canvases),
+                'bytes': sum(canvas._buffer_bytes() for canvas in canvases),
+                'max_bytes': self.max_bytes,
+                'released': self._stats['released'],
+                'reclaimed_bytes': self._stats['reclaimed_bytes'],
+            }
+
+
+# Shared by all the canvases, change max_bytes and idle_timeout to tune it
+buffer_budget = _BufferBudget()
+
+
+class _AnimationStream:
+    """
+    The frames of an animation, rendered ahead and played by the front-end.
+
+    Up to ``animation_lookahead`` frames, and about ``animation_max_bytes`` of
+    them, are rendered and sent in batches before the front-end reports
+    having played them. The front-end waits for the interval of the
+    animation between frames. Rendering is resumed once a batch of frames
+    was played. With a running event loop, one frame is rendered per loop
+    iteration so that the kernel handles other messages in between.
+    """
+
+    def __init__(self, canvas, animation, stream_id):
+        self.canvas = canvas
+        self.animation = animation
+        self.id = stream_id
+        self.frames = animation.new_frame_seq()
+        self.done = False
+        self._filling = False
+        self._fill_handle = None
+        # Index and delay of the next frame
+        self._index = 0
+        self._delay = 0
+        # The frames waiting to be sent, as encoded bytes or futures, with
+        # their delays, and the batches waiting for their frames to be encoded
+        self._batch = []
+        self._outbox = deque()
+        # Size of the frames sent and not played yet
+        self._in_flight = deque()
+        self._bytes = 0
+
+    @property
+    def batch_size(self):
+        return max(1, self.canvas.animation_lookahead // 4)
+
+    def _has_room(self):
+        frames = len(self._in_flight) + len(self._batch)
+        if frames == 0:
+            return True
+        return (
+            frames < self.canvas.animation_lookahead
+            and self._bytes < self.canvas.animation_max_bytes
+        )
+
+    def fill(self):
+        """Render frames until the lookahead or the memory cap is reached."""
+        self._fill_handle = None
+        if self._filling or self.done:
+            return
+        loop = _running_loop()
+        self._filling = True
+        try:
+            while self._has_room():
+                frame = self._next_frame()
+                if frame is None:
+                    self._flush()
+                    self._end()
+                    return
+                self._render(*frame)
+                if len(self._batch) >= self.batch_size:
+                    self._flush()
+                if loop is not None:
+                    self._fill_handle = loop.call_soon(self.fill)
+                    return
+            self._flush()
+        finally:
+            self._filling = False
+
+    def played(self, count):
+        """Record that the front-end played ``count`` frames."""
+        for _ in range(min(count, len(self._in_flight))):
+            self._bytes -= self._in_flight.popleft()
+        room = self.canvas.animation_lookahead - len(self._in_flight)
+        if room >= self.batch_size and self._fill_handle is None:
+            self.fill()
+
+    def stop(self):
+        """Stop rendering frames, and let the front-end drop the ones it has."""
+        if self._fill_handle is not None:
+            self._fill_handle.cancel()
+            self._fill_handle = None
+        self._batch = []
+        self._outbox.clear()
+        self.done = True
+        self.canvas._send_message(self._header(stop=True))
+
+    def _next_frame(self):
+        """Return the next frame data and its delay, or None at the end."""
+        try:
+            return next(self.frames), self._delay
+        except StopIteration:
+            if not self.animation._repeat:
+                return None
+        # Restart, as TimedAnimation does
+        self.animation._init_draw()
+        self.frames = self.animation.new_frame_seq()
+        try:
+            framedata = next(self.frames)
+        except StopIteration:
+            return None
+        return framedata, self.animation._interval + self.animation._repeat_delay
+
+    def _render(self, framedata, delay):
+        canvas = self.canvas
+        # Animated artists, e.g. of blitting animations, are only drawn while
+        # saving the figure. Nor does pyplot's interactive mode draw the
+        # figure the frame makes stale while it is saving.
+        canvas._is_saving = True
+        try:
+            self.animation._draw_frame(framedata)
+            canvas._draw_start = time.perf_counter()
+            FigureCanvasAgg.draw(canvas)
+        finally:
+            canvas._is_saving = False
+            canvas._draw_start = None
+        canvas._stats['animation_frames'] += 1
+        # The next frame sent the usual way needs the new render
+        canvas._png_is_old = True
+        canvas._force_full = True
+
+        start = time.perf_counter()
+        pixels = np.asarray(canvas.get_renderer().buffer_rgba())
+        codec = (canvas.image_codec, canvas.image_quality, canvas.image_compression)
+        if canvas.threaded_encoding and _running_loop() is not None:
+            # The renderer buffer is overwritten by the next frame
+            frame = _get_encoder().submit(_encode_image, pixels.copy(), *codec)
+        else:
+            frame = _encode_image(pixels, *codec)
+            canvas._record_timing('encode_ms', start)
+            self._bytes += len(frame)
+        self._batch.append((frame, delay))
+        self._delay = self.animation._interval
+
+    def _header(self, **kwargs):
+        header = {'type': 'animation', 'id': self.id, 'start': self._index}
+        header.update(kwargs)
+        return header
+
+    def _flush(self):
+        """Send the rendered frames, once they are encoded."""
+        if not self._batch:
+            return
+        frames, delays = zip(*self._batch)
+        self._batch = []
+        renderer = self.canvas.get_renderer()
+        header = self._header(
+            mime=_image_codecs[self.canvas.image_codec][0],
+            width=int(renderer.width),
+            height=int(renderer.height),
+            delays=list(delays),
+            ack=self.batch_size,
+        )
+        self._index += len(frames)
+        self._outbox.append((header, frames))
+
+        loop = _running_loop()
+        for frame in frames:
+            if isinstance(frame, Future):
+
+                def on_encoded(future):
+                    try:
+                        loop.call_soon_threadsafe(self._send_encoded)
+                    except RuntimeError:
+                        # The event loop is closed
+                        pass
+
+                frame.add_done_callback(on_encoded)
+        self._send_encoded()
+
+    def _end(self):
+        """Let the front-end know there are no more frames."""
+        self.done = True
+        self._outbox.append((self._header(end=True), ()))
+        self._send_encoded()
+        # Remove the animated flags of the artists, as TimedAnimation does
+        if self.animation.event_source is not None:
+            self.animation.pause()
+
+    def _send_encoded(self):
+        canvas = self.canvas
+        while self._outbox:
+            header, frames = self._outbox[0]
+            futures = [frame for frame in frames if isinstance(frame, Future)]
+            if not all(future.done() for future in futures):
+                return
+            self._outbox.popleft()
+            buffers = []
+            for frame in frames:
+                if isinstance(frame, Future):
+                    frame = frame.result()
+                    self._bytes += len(frame)
+                buffers.append(frame)
+                self._in_flight.append(len(frame))
+            canvas._stats['animation_bytes'] += sum(len(b) for b in buffers)
+            canvas._send_message(header, buffers=buffers)
+
+
+class _AnimationTimer(TimerTornado):
+    """
+    Timer of the canvas, streaming the animations it drives instead of
+    drawing them on every tick when ``Canvas.stream_animations`` is on.
+    """
+
+    def __init__(self, canvas, *args, **kwargs):
+        self._canvas = canvas
+        super().__init__(*args, **kwargs)
+
+    def _timer_start(self):
+        canvas = self._canvas
+        if canvas.stream_animations and not canvas._is_deferred:
+            from matplotlib.animation import Animation
+
+            for func, _, _ in self.callbacks:
+                animation = getattr(func, '__self__', None)
+                if isinstance(animation, Animation) and animation.event_source is self:
+                    canvas.stream_animation(animation)
+                    return
+        super()._timer_start()
 
 
 def connection_info():
@@ -104,19 +721,68 @@ def connection_info():
     use.
 
     """
-    with _lock:
-        result = []
-        for manager in Gcf.get_all_fig_managers():
-            fig = manager.canvas.figure
-            result.append(
-                '{} - {}'.format(
-                    (fig.get_label() or f"Figure {manager.num}"),
-                    manager.web_sockets,
-                )
+    def mean(stats, name):
+        value = stats[name]['mean']
+        return 'n/a' if value is None else f'{value:.1f} ms'
+
+    with _gcf_lock:
+        managers = Gcf.get_all_fig_managers()
+        pending = len(_Backend_ipympl._to_show)
+
+    result = []
+    totals = Counter()
+    for manager in managers:
+        fig = manager.canvas.figure
+        result.append(
+            '{} - {}'.format(
+                (fig.get_label() or f"Figure {manager.num}"),
+                manager.web_sockets,
+            )
+        )
+        if not isinstance(manager.canvas, Canvas):
+            continue
+        stats = manager.canvas.stats
+        frames = stats['frames']
+        totals.update(frames)
+        totals['bytes'] += stats['bytes_sent']
+        result.append(
+            '    {} frames sent, {} dropped, {} bytes; draw {}, encode {}, '
+            'send {}, decode {}, paint {}, round trip {}, queue {}'.format(
+                frames['sent'],
+                frames['dropped'],
+                stats['bytes_sent'],
+                mean(stats, 'draw_ms'),
+                mean(stats, 'encode_ms'),
+                mean(stats, 'send_ms'),
+                mean(stats, 'decode_ms'),
+                mean(stats, 'paint_ms'),
+                mean(stats, 'round_trip_ms'),
+                mean(stats, 'queue_ms'),
             )
-        if not is_interactive():
-            result.append(f'Figures pending show: {len(Gcf._activeQue)}')
-        return '\n'.join(result)
+        )
+        result.append(_format_lock_stats('    lock', stats['lock']))
+    if totals:
+        result.append(
+            'Total: {} frames rendered, {} sent, {} dropped, {} bytes'.format(
+                totals['rendered'],
+                totals['sent'],
+                totals['dropped'],
+                totals['bytes'],
+            )
+        )
+    result.append(_format_lock_stats('Gcf lock', _gcf_lock.stats()))
+    buffers = buffer_budget.info()
+    result.append(
+        'Buffers: {} bytes in {} canvases, {} released, {} bytes reclaimed'.format(
+            buffers['bytes'],
+            buffers['canvases'],
+            buffers['released'],
+            buffers['reclaimed_bytes'],
+        )
+    )
+    if not is_interactive():
+        result.append(f'Figures pending show: {pending}')
+    return '\n'.join(result)
 
 
 class Toolbar(DOMWidget, NavigationToolbar2WebAgg):
@@ -144,6 +810,32 @@ class Toolbar(DOMWidget, NavigationToolbar2WebAgg):
     collapsed = Bool(True).tag(sync=True)
     #######
 
+    export_format = CaselessStrEnum(
+        values=['png', 'png-palette', 'jpeg', 'webp', 'svg'],
+        default_value='png',
+        help="""Format of the image exported by the export button.""",
+    )
+    export_quality = CInt(
+        85, min=0, max=100, help="""Quality of the 'jpeg' and 'webp' exports."""
+    )
+    export_max_width = CInt(
+        0,
+        min=0,
+        help="""Maximum width in pixels of the exported image, larger figures
+        are downscaled. 0 means no limit.""",
+    )
+    export_max_bytes = CInt(
+        0,
+        min=0,
+        help="""Maximum size in bytes of the exported image, it is downscaled
+        until it fits. 0 means no limit.""",
+    )
+    export_mimebundle = Bool(
+        False,
+        help="""Export the image as an image/* output instead of an HTML <img>
+        tag with a base64 data URL.""",
+    )
+
     _current_action = Enum(values=['pan', 'zoom', ''], default_value='').tag(sync=True)
 
     def __init__(self, canvas, *args, **kwargs):
@@ -156,9 +848,39 @@ class Toolbar(DOMWidget, NavigationToolbar2WebAgg):
         """Override to use rcParams-aware save."""
         self.canvas._send_save_buffer()
 
-    def export(self):
-        buf = io.BytesIO()
-        self.canvas.figure.savefig(buf, format='png', dpi='figure')
+    def export(
+        self,
+        format=None,
+        quality=None,
+        max_width=None,
+        max_bytes=None,
+        mimebundle=None,
+    ):
+        """
+        Display the figure as a static image in the output.
+
+        The last rendered frame is reused when the figure did not change
+        since. The parameters default to the ``export_*`` traits.
+
+        Parameters
+        ----------
+        format : {'png', 'png-palette', 'jpeg', 'webp', 'svg'}
+        quality : int
+            Quality of the 'jpeg' and 'webp' formats, from 0 to 100.
+        max_width : int
+            Maximum width of the image in pixels, 0 means no limit.
+        max_bytes : int
+            Maximum size of the image in bytes, 0 means no limit. SVG images
+            are not downscaled.
+        mimebundle : bool
+            Whether to display an image/* output rather than an HTML <img>.
+        """
+        format = self.export_format if format is None else format.lower()
+        quality = self.export_quality if quality is None else quality
+        max_width = self.export_max_width if max_width is None else max_width
+        max_bytes = self.export_max_bytes if max_bytes is None else max_bytes
+        mimebundle = self.export_mimebundle if mimebundle is None else mimebundle
+
         # Figure width in pixels
         pwidth = self.canvas.figure.get_figwidth() * self.canvas.figure.get_dpi()
         # Scale size to match widget on HiDPI monitors.
@@ -166,10 +888,58 @@ class Toolbar(DOMWidget, NavigationToolbar2WebAgg):
             width = pwidth / self.canvas.device_pixel_ratio
         else:
             width = pwidth / self.canvas._dpi_ratio
-        data = "<img src='data:image/png;base64,{0}' width={1}/>"
-        data = data.format(b64encode(buf.getvalue()).decode('utf-8'), width)
-        with _lock:
-            display(HTML(data))
+
+        if format == 'svg':
+            mime = 'image/svg+xml'
+            buf = io.BytesIO()
+            self.canvas.figure.savefig(buf, format='svg', dpi='figure')
+            image = buf.getvalue()
+        elif format == 'png' and not max_width and not max_bytes:
+            mime = 'image/png'
+            image = self.canvas._get_snapshot_png()
+        else:
+            mime, _ = _image_codecs[format]
+            image = self._export_raster(format, quality, max_width, max_bytes)
+
+        if mimebundle:
+            if format == 'svg':
+                data = image.decode('utf-8')
+            else:
+                data = b64encode(image).decode('utf-8')
+            with self.canvas.manager._lock:
+                display(
+                    {mime: data},
+                    raw=True,
+                    metadata={mime: {'width': width}},
+                )
+        else:
+            data = "<img src='data:{0};base64,{1}' width={2}/>"
+            data = data.format(mime, b64encode(image).decode('utf-8'), width)
+            with self.canvas.manager._lock:
+                display(HTML(data))
+
+    def _export_raster(self, codec, quality, max_width, max_bytes):
+        """Encode the figure, downscaled to fit ``max_width`` and ``max_bytes``."""
+        from PIL import Image
+
+        image = Image.fromarray(self.canvas._get_snapshot_rgba())
+        resampling = getattr(Image, 'Resampling', Image).LANCZOS
+
+        if max_width and image.width > max_width:
+            height = max(1, round(image.height * max_width / image.width))
+            image = image.resize((max_width, height), resampling)
+
+        data = _encode_image(np.asarray(image), codec, quality)
+        # The size is roughly proportional to the number of pixels
+        while max_bytes and len(data) > max_bytes and image.width > 16:
+            scale = min(0.9 * np.sqrt(max_bytes / len(data)), 0.9)
+            size = (
+                max(1, round(image.width * scale)),
+                max(1, round(image.height * scale)),
+            )
+            image = image.resize(size, resampling)
+            data = _encode_image(np.asarray(image), codec, quality)
+        return data
 
     @default('toolitems')
     def _default_toolitems(self):
@@ -236,6 +1006,133 @@ class Canvas(DOMWidget, FigureCanvasWebAggCore):
     resizable = Bool(True).tag(sync=True)
     capture_scroll = Bool(False).tag(sync=True)
     pan_zoom_throttle = Float(33).tag(sync=True)
+    adaptive_throttle = Bool(
+        False,
+        help="""Throttle the motion and scroll events to the time the front-end
+        measures from an event to the frame it results in, rather than to
+        pan_zoom_throttle, so that cheap figures update smoothly and expensive
+        ones do not flood the kernel.""",
+    ).tag(sync=True)
+    min_pan_zoom_throttle = Float(
+        16, min=0, help="""Lower bound of the adaptive throttle, in ms."""
+    ).tag(sync=True)
+    max_pan_zoom_throttle = Float(
+        500, min=0, help="""Upper bound of the adaptive throttle, in ms."""
+    ).tag(sync=True)
+
+    image_codec = CaselessStrEnum(
+        values=list(_image_codecs),
+        default_value='png',
+        help="""Codec of the image frames sent to the front-end. 'png-palette'
+        quantizes the frames to 256 colors, 'jpeg' cannot send diff frames and
+        'raw-zlib' sends compressed RGBA pixels.""",
+    )
+    image_quality = CInt(
+        85, min=0, max=100, help="""Quality of the 'jpeg' and 'webp' frames."""
+    )
+    image_compression = CInt(
+        6, min=0, max=9, help="""zlib level of the 'png' and 'raw-zlib' frames."""
+    )
+    max_fps = Float(
+        0,
+        min=0,
+        help="""Maximum number of frames per second sent to the front-end,
+        frames superseded in the meantime are dropped. 0 means no limit.""",
+    )
+    threaded_encoding = Bool(
+        False,
+        help="""Encode the frames in a background thread, so that the kernel
+        processes other messages in the meantime. Frames are still sent in
+        order. Frames are encoded synchronously when there is no running
+        event loop.""",
+    )
+    coalesce_events = Bool(
+        True,
+        help="""Merge the motion and scroll events that queue up in the kernel
+        while it is busy into the latest one, summing the scroll steps, so
+        that interactions do not lag behind the mouse.""",
+    )
+    interaction_scale = Float(
+        1,
+        min=0.1,
+        max=1,
+        help="""Scale of the resolution of the frames rendered while a mouse
+        button is held or the figure is resized, e.g. 0.5 renders them at
+        half the DPI. The front-end upscales them, and a full resolution frame
+        is sent once the interaction is over. 1 disables it.""",
+    )
+    headless = Bool(
+        None,
+        allow_none=True,
+        help="""Whether to defer rendering until the figure is displayed or its
+        state saved, instead of sending every frame to the front-end. An
+        explicit draw still renders the figure, only its frame is not sent.
+        None (the default) defers it until a front-end is connected, e.g. when
+        running with nbconvert or papermill.""",
+    )
+    state_max_pixels = CInt(
+        0,
+        min=0,
+        help="""Maximum number of pixels of the snapshot of the figure saved in
+        the widget state, larger snapshots are downscaled. 0 means no limit.""",
+    ).tag(sync=True)
+    state_image_codec = CaselessStrEnum(
+        values=['png', 'png-palette', 'jpeg', 'webp'],
+        default_value='png',
+        help="""Codec of the snapshot of the figure saved in the widget state.
+        The front-end saves 'png-palette' snapshots as 'png'.""",
+    ).tag(sync=True)
+    state_image_quality = CInt(
+        85,
+        min=0,
+        max=100,
+        help="""Quality of the 'jpeg' and 'webp' snapshots, from 0 to 100.""",
+    ).tag(sync=True)
+    dedup_state = Bool(
+        False,
+        help="""Save snapshots identical to the one of another figure as a
+        reference to that figure in the widget state. Only ipympl front-ends
+        from this version on can display such references, and the figure
+        referenced must be saved in the same notebook.""",
+    ).tag(sync=True)
+    stream_animations = Bool(
+        False,
+        help="""Stream the animations driven by the timers of the canvas, e.g.
+        FuncAnimation, see stream_animation.""",
+    )
+    animation_lookahead = CInt(
+        60,
+        min=1,
+        help="""Maximum number of frames of a streamed animation rendered ahead
+        of the front-end playing them.""",
+    )
+    animation_max_bytes = CInt(
+        64 * 1024**2,
+        min=1,
+        help="""Approximate maximum size in bytes of the frames of a streamed
+        animation rendered ahead of the front-end playing them.""",
+    )
+    download_chunk_size = CInt(
+        1024**2,
+        min=1,
+        help="""Size in bytes of the chunks downloaded files are sent in.""",
+    )
+    download_progress = Float(
+        0, help="""Fraction of the last downloaded file sent to the front-end."""
+    )
+    dpi_ratio_policy = CaselessStrEnum(
+        values=['max', 'min', 'last'],
+        default_value='max',
+        help="""DPI ratio the figure is rendered at when it is displayed on
+        screens with different DPI ratios: the highest, the lowest, or the one
+        of the last display.""",
+    )
+    max_pixels = CInt(
+        0,
+        min=0,
+        help="""Maximum number of pixels of the rendered figure, the DPI ratio
+        is lowered down to 1 to stay within it. 0 means no limit.""",
+    )
 
     # This is a very special widget trait:
     # We set "sync=True" because we want ipywidgets to consider this
@@ -244,8 +1141,30 @@ class Canvas(DOMWidget, FigureCanvasWebAggCore):
     # own value.
     # This will still be used by ipywidgets in the case of embedding.
     _data_url = Any(None).tag(sync=True)
+    # The _data_url is only encoded when the widget state is requested, those
+    # keep track of whether it is out of date and of the last full PNG frame,
+    # which can be reused as is.
+    _data_url_is_old = Bool(False)
+    _last_png = Any(None)
+    # Snapshot in the _data_url, as (mime, data), its digest, and the figures
+    # referencing it
+    _state_image = Any(None)
+    _state_digest = Any(None)
+    _state_dependents = Instance(WeakSet, ())
+    # Whether the figure changed since it was last rendered, while rendering
+    # is deferred (see headless)
+    _render_deferred = Bool(False)
+    # Whether the figure was rendered while sending frames is deferred, and
+    # the frame was neither sent nor saved in the state since
+    _frame_deferred = Bool(False)
+
+    # Message sent along with the last frame returned by get_diff_image
+    _frame_header = Any()
 
     _size = Tuple([0, 0]).tag(sync=True)
+    # DPI ratio the frames are rendered at, the front-end scales them to its
+    # own DPI ratio
+    _render_ratio = Float(1.0).tag(sync=True)
 
     _figure_label = Unicode('Figure').tag(sync=True)
     _message = Unicode().tag(sync=True)
@@ -253,11 +1172,6 @@ class Canvas(DOMWidget, FigureCanvasWebAggCore):
 
     _image_mode = Unicode('full').tag(sync=True)
 
-    _rubberband_x = CInt(0).tag(sync=True)
-    _rubberband_y = CInt(0).tag(sync=True)
-    _rubberband_width = CInt(0).tag(sync=True)
-    _rubberband_height = CInt(0).tag(sync=True)
-
     _closed = Bool(True)
 
     # Must declare the superclass private members.
@@ -265,8 +1179,8 @@ class Canvas(DOMWidget, FigureCanvasWebAggCore):
     _force_full = Bool()
     _current_image_mode = Unicode()
 
-    # Static as it should be the same for all canvases
-    current_dpi_ratio = 1.0
+    # Blitted regions are sent on their own to the front-end
+    supports_blit = True
 
     def __init__(self, figure, *args, **kwargs):
         DOMWidget.__init__(self, *args, **kwargs)
@@ -278,6 +1192,89 @@ class Canvas(DOMWidget, FigureCanvasWebAggCore):
         # front-end (e.g. nbconvert --execute)
         self.syncing_data_url = True
 
+        # PNG snapshot of the last frame rendered by Agg, reused for displaying
+        # and exporting the figure while it is still up to date.
+        self._snapshot = None
+        self._renderer_is_current = False
+        self._stats = Counter()
+        # Rolling samples of the frame timings and sizes, and the messages
+        # received from the front-end per type
+        self._timings = defaultdict(lambda: deque(maxlen=_stats_window))
+        self._events = Counter()
+        self._draw_start = None
+        self.mpl_connect('draw_event', self._on_draw_event)
+
+        # Messages and state changes waiting to be sent as one comm message
+        # while an event is handled, see _batch_messages
+        self._outbox = None
+        self._outbox_state = {}
+
+        # Regions changed by blit since the last frame, None when the whole
+        # canvas may have changed.
+        self._blit_regions = None
+
+        # DPI ratio of every front-end displaying the canvas, by client id, the
+        # most recent last
+        self._client_ratios = {}
+
+        # Frames encoded in the background, in the order they are sent
+        self._pending_frames = deque()
+
+        # Downloads: the last one, and the last saved file with what it was
+        # saved for.
+        self._download = None
+        self._download_id = 0
+        self._download_cache = None
+        self._live_draws = 0
+
+        # The front-ends that cannot see the figure, and when it was last
+        # drawn or interacted with, for releasing its buffers
+        self._hidden_clients = set()
+        self._last_used = time.monotonic()
+
+        # The motion or scroll event waiting to be dispatched, and the
+        # smallest difference seen between the front-end and kernel clocks
+        self._pending_event = None
+        self._pending_event_handle = None
+        self._clock_offsets = {}
+
+        # Whether the frames are rendered at a lower resolution because a
+        # button is held ('button') or the figure is resized ('resize')
+        self._interaction = None
+        self._interaction_timer = None
+        self._last_resize = -np.inf
+
+        # The animation being streamed, see stream_animation
+        self._animation_stream = None
+        self._animation_id = 0
+
+        # Frame scheduling: whether a draw was requested to the front-end and
+        # its frame not sent yet, whether the figure changed after that frame
+        # was rendered, and the frame waiting for max_fps to allow it.
+        self._draw_requested = False
+        self._draw_after_frame = False
+        self._frame_timer = None
+        self._frame_needs_draw = False
+        self._last_frame_time = 0
+
+    @validate('image_codec')
+    def _validate_image_codec(self, proposal):
+        from PIL import features
+
+        if proposal.value == 'webp' and not features.check('webp'):
+            raise TraitError('Pillow was built without WebP support')
+        return proposal.value
+
+    @observe('dpi_ratio_policy', 'max_pixels')
+    def _on_dpi_ratio_policy_changed(self, change):
+        self._update_device_pixel_ratio()
+
+    @observe('image_codec')
+    def _on_image_codec_changed(self, change):
+        # Diff frames are composited over the previous frame, the next one
+        # needs to be complete after switching codecs.
+        self._force_full = True
+
     # Overwrite ipywidgets's send_state so we don't sync the data_url
     def send_state(self, key=None):
         if key is None:
@@ -290,28 +1287,350 @@ class Canvas(DOMWidget, FigureCanvasWebAggCore):
         if not self.syncing_data_url:
             keys = [k for k in keys if k != '_data_url']
 
-        DOMWidget.send_state(self, key=keys)
+        if self._outbox is not None:
+            # Sent along with the messages of the event being handled, unless
+            # the front-end needs to deserialize them
+            batched = [k for k in keys if self.trait_metadata(k, 'to_json') is None]
+            self._outbox_state.update(self.get_state(batched))
+            keys = [k for k in keys if k not in batched]
+
+        if keys:
+            self._stats['messages_sent'] += 1
+            DOMWidget.send_state(self, key=keys)
+
+    def get_state(self, key=None, drop_defaults=False):
+        if key is None:
+            keys = self.keys
+        elif isinstance(key, str):
+            keys = [key]
+        else:
+            keys = key
+
+        if '_data_url' in keys:
+            self._update_data_url()
+
+        return DOMWidget.get_state(self, key=key, drop_defaults=drop_defaults)
+
+    def _update_data_url(self):
+        """Encode the last frame into ``_data_url`` if it is out of date."""
+        state_image = self._encode_data_url()
+        if state_image is not None:
+            self._set_state_image(*state_image)
+
+    def _encode_data_url(self):
+        """
+        Return the last frame encoded for the ``_data_url``, as (mime, data),
+        or None if the ``_data_url`` is up to date.
+        """
+        source = self._data_url_source()
+        if source is None:
+            return None
+        return self._encode_state_image(*source)
+
+    def _data_url_source(self):
+        """
+        Return the last frame to encode for the ``_data_url``, as the
+        arguments of ``_encode_state_image``, or None if the ``_data_url`` is
+        up to date. The figure is rendered first if it was deferred.
+        """
+        if self._render_deferred or self._frame_deferred:
+            self._render_deferred_frame()
+            self._frame_deferred = False
+            pixels = np.asarray(self.buffer_rgba())
+            png = None
+        elif not self._data_url_is_old:
+            return None
+        else:
+            pixels = self._last_buff.view(dtype=np.uint8).reshape(
+                (*self._last_buff.shape, 4)
+            )
+            png = self._last_png
+        self._data_url_is_old = False
+        return pixels, png
+
+    def _encode_state_image(self, pixels, png=None):
+        """
+        Encode a snapshot for the widget state, downscaled to
+        ``state_max_pixels`` and with ``state_image_codec``.
+
+        Parameters
+        ----------
+        pixels : (height, width, 4) uint8 array
+        png : bytes, optional
+            The snapshot already encoded as a PNG, reused when possible.
+
+        Returns
+        -------
+        mime : str
+        data : bytes
+        """
+        height, width = pixels.shape[:2]
+        max_pixels = self.state_max_pixels
+        downscale = max_pixels and width * height > max_pixels
+        codec = self.state_image_codec
+        if png is not None and codec == 'png' and not downscale:
+            return 'image/png', png
+
+        if downscale:
+            from PIL import Image
+
+            scale = np.sqrt(max_pixels / (width * height))
+            size = (max(1, int(width * scale)), max(1, int(height * scale)))
+            resampling = getattr(Image, 'Resampling', Image).LANCZOS
+            pixels = np.asarray(Image.fromarray(pixels).resize(size, resampling))
+        data = _encode_image(pixels, codec, self.state_image_quality)
+        return _image_codecs[codec][0], data
+
+    def _set_state_image(self, mime, data):
+        """
+        Set the ``_data_url`` to the snapshot, or to a reference to another
+        figure with the same snapshot.
+        """
+        import hashlib
+
+        digest = hashlib.sha1(data).digest()
+        changed = digest != self._state_digest
+        self._state_image = (mime, data)
+        self._state_digest = digest
+
+        owner = _state_images.get(digest)
+        if (
+            self.dedup_state
+            and owner is not None
+            and owner is not self
+            and owner._state_digest == digest
+        ):
+            owner._state_dependents.add(self)
+            self._data_url = _data_url_ref + owner.model_id
+        else:
+            _state_images[digest] = self
+            data_url = b64encode(data).decode('utf-8')
+            self._data_url = f'data:{mime};base64,{data_url}'
+
+        if changed:
+            self._release_state_dependents()
+
+    def _release_state_dependents(self):
+        """Give the figures referencing the snapshot of this one their own."""
+        dependents = list(self._state_dependents)
+        self._state_dependents.clear()
+        for canvas in dependents:
+            # Closed figures are not displayed anymore
+            if canvas.comm is not None:
+                canvas._set_state_image(*canvas._state_image)
+
+    def close(self):
+        self._state_digest = None
+        self._release_state_dependents()
+        self.stop_animation()
+        DOMWidget.close(self)
 
     def _handle_message(self, object, content, buffers):
+        with self._batch_messages():
+            self._process_message(content)
+
+    def _process_message(self, content):
         # Every content has a "type".
+        self._events[content['type']] += 1
+        self._record_frontend_timings(content.get('timings'))
+        self._record_queue_latency(content)
+        self._last_used = time.monotonic()
+
+        if (
+            content['type'] == 'motion_notify'
+            and self._interaction == 'button'
+            and not content.get('buttons')
+        ):
+            # The button was released out of the figure
+            self._dispatch_pending_event()
+            self._end_interaction()
+
+        if content['type'] in _coalesced_events and self.coalesce_events:
+            self._queue_event(self._scale_event(content))
+            return
+        # Keep the events in order
+        self._dispatch_pending_event()
+
+        if content['type'] == 'button_press':
+            self._begin_interaction('button')
+        elif content['type'] == 'resize':
+            self._begin_interaction('resize')
+        self._scale_event(content)
+
         if content['type'] == 'closing':
             self._closed = True
+            self._hidden_clients.discard(content.get('client_id'))
+            if self._client_ratios.pop(content.get('client_id'), None):
+                self._update_device_pixel_ratio()
+            buffer_budget.enforce()
+
+        elif content['type'] == 'visibility':
+            if content['visible']:
+                self._hidden_clients.discard(content.get('client_id'))
+            else:
+                self._hidden_clients.add(content.get('client_id'))
+                buffer_budget.enforce()
 
         elif content['type'] == 'initialized':
             # We stop syncing data url, the front-end is there and
             # ready to receive diffs
             self.syncing_data_url = False
+            self._data_url_is_old = False
+            self._last_png = None
+            self._draw_requested = False
 
             _, _, w, h = self.figure.bbox.bounds
             self.manager.resize(w, h)
 
-        elif content['type'] == 'set_dpi_ratio':
-            Canvas.current_dpi_ratio = content['dpi_ratio']
-            self.manager.handle_json(content)
+            if self._render_deferred or self._frame_deferred:
+                self._render_deferred = False
+                self._frame_deferred = False
+                self.draw_idle()
+
+        elif content['type'] == 'cancel_download':
+            self.cancel_download()
+
+        elif content['type'] == 'animation_played':
+            stream = self._animation_stream
+            if stream is not None and stream.id == content['id']:
+                stream.played(content['frames'])
+
+        elif content['type'] in ('set_dpi_ratio', 'set_device_pixel_ratio'):
+            ratio = content.get('device_pixel_ratio', content.get('dpi_ratio', 1))
+            client_id = content.get('client_id')
+            self._client_ratios.pop(client_id, None)
+            self._client_ratios[client_id] = ratio
+            self._update_device_pixel_ratio()
 
         else:
             self.manager.handle_json(content)
 
+        if content['type'] == 'button_release':
+            self._end_interaction()
+
+    def _scale_event(self, event):
+        """
+        Convert the position of a mouse event to the current DPI ratio, from
+        the one the front-end used, which lags behind while it changes.
+        """
+        render_ratio = event.get('render_ratio')
+        if render_ratio and 'x' in event:
+            scale = self.device_pixel_ratio / render_ratio
+            event['x'] *= scale
+            event['y'] *= scale
+        return event
+
+    def _begin_interaction(self, kind):
+        """Render at ``interaction_scale`` until the interaction is over."""
+        if self.interaction_scale >= 1:
+            return
+
+        if kind == 'resize':
+            # A single resize is not worth two frames
+            now = time.monotonic()
+            resizing = now - self._last_resize < _resize_settle_time
+            self._last_resize = now
+            if not resizing:
+                return
+            # The front-end does not tell when resizing is over
+            if self._interaction_timer is not None:
+                self._interaction_timer.cancel()
+            self._interaction_timer = _call_later(
+                _resize_settle_time, self._end_interaction
+            )
+            if self._interaction_timer is None:
+                return
+
+        if self._interaction is None:
+            self._interaction = kind
+            self._stats['interactions'] += 1
+            self._update_device_pixel_ratio()
+
+    def _end_interaction(self):
+        """Render the figure at full resolution again."""
+        if self._interaction_timer is not None:
+            self._interaction_timer.cancel()
+            self._interaction_timer = None
+        if self._interaction is not None:
+            self._interaction = None
+            self._update_device_pixel_ratio()
+
+    def _queue_event(self, event):
+        """
+        Dispatch the event once the messages already received are handled,
+        merging it with the events received in the meantime.
+        """
+        pending = self._pending_event
+        if pending is not None and _can_merge_events(pending, event):
+            if event['type'] == 'scroll':
+                event = dict(event, step=pending['step'] + event['step'])
+            self._pending_event = event
+            self._stats['events_coalesced'] += 1
+            return
+
+        self._dispatch_pending_event()
+        self._pending_event = event
+        loop = _running_loop()
+        if loop is None:
+            self._dispatch_pending_event()
+        else:
+            self._pending_event_handle = loop.call_soon(self._dispatch_pending_event)
+
+    def _dispatch_pending_event(self):
+        if self._pending_event_handle is not None:
+            self._pending_event_handle.cancel()
+            self._pending_event_handle = None
+        event, self._pending_event = self._pending_event, None
+        if event is not None:
+            with self._batch_messages():
+                self.manager.handle_json(event)
+
+    def _record_queue_latency(self, content):
+        """Record how long the message waited before the kernel handled it."""
+        timestamp = content.get('timestamp')
+        if not isinstance(timestamp, (int, float)):
+            return
+        # The front-end and kernel clocks may differ: the latency is measured
+        # from the smallest difference seen, which is when nothing was queued.
+        offset = time.time() * 1000 - timestamp
+        client_id = content.get('client_id')
+        min_offset = min(self._clock_offsets.get(client_id, offset), offset)
+        self._clock_offsets[client_id] = min_offset
+        self._timings['queue_ms'].append(offset - min_offset)
+
+    def _update_device_pixel_ratio(self):
+        """
+        Render at the DPI ratio of the front-ends, according to the
+        ``dpi_ratio_policy``, within ``max_pixels``, and scaled by
+        ``interaction_scale`` during interactions.
+        """
+        ratios = list(self._client_ratios.values())
+        if not ratios:
+            return
+        if self.dpi_ratio_policy == 'max':
+            ratio = max(ratios)
+        elif self.dpi_ratio_policy == 'min':
+            ratio = min(ratios)
+        else:
+            ratio = ratios[-1]
+
+        if self.max_pixels:
+            # Size in front-end pixels
+            width, height = self.figure.bbox.size / self.device_pixel_ratio
+            budget_ratio = np.sqrt(self.max_pixels / max(width * height, 1))
+            ratio = min(ratio, max(budget_ratio, 1))
+
+        if self._interaction is not None:
+            ratio *= self.interaction_scale
+
+        self._handle_set_device_pixel_ratio(ratio)
+        self._render_ratio = self.device_pixel_ratio
+
+    def handle_resize(self, event):
+        FigureCanvasWebAggCore.handle_resize(self, event)
+        if self.max_pixels:
+            self._update_device_pixel_ratio()
+
     def send_json(self, content):
         # Change in the widget state?
         if content['type'] == 'cursor':
@@ -330,30 +1649,217 @@ class Canvas(DOMWidget, FigureCanvasWebAggCore):
             # We absolutely need this instead of a `_size` trait change listening
             # on the front-end, otherwise ipywidgets might squash multiple changes
             # and the resizing protocol is not respected anymore
-            self.send({'data': json.dumps(content)})
+            self._send_message(content)
 
         elif content['type'] == 'image_mode':
             self._image_mode = content['mode']
 
         else:
             # Default: send the message to the front-end
-            self.send({'data': json.dumps(content)})
+            self._send_message(content)
+
+    def _send_message(self, content, buffers=None):
+        """
+        Send a message to the front-end, in the batch of the event being
+        handled if any. A message with buffers is sent on its own, after the
+        messages batched before it.
+        """
+        if self._outbox is not None:
+            if not buffers:
+                self._outbox.append(content)
+                return
+            self._flush_outbox()
+
+        self._stats['messages_sent'] += 1
+        self.send(content, buffers=buffers)
+
+    @contextmanager
+    def _batch_messages(self):
+        """
+        Send the messages and the state changes resulting from an event to the
+        front-end as one comm message.
+
+        A single message, or state changes alone, are sent as usual. Several
+        messages, or messages along with state changes, are sent as a
+        ``batch`` message:
+        ``{'type': 'batch', 'messages': [...], 'state': {...}}``. The
+        front-end applies the state, then handles the messages in order.
+        """
+        if self._outbox is not None:
+            # Part of the event being handled
+            yield
+            return
+
+        self._outbox = []
+        self._outbox_state = {}
+        try:
+            # The state changes are collected when hold_sync ends
+            with self.hold_sync():
+                yield
+        finally:
+            self._flush_outbox()
+            self._outbox = None
+
+    def _flush_outbox(self):
+        """Send the messages and state changes batched so far."""
+        messages, state = self._outbox, self._outbox_state
+        self._outbox, self._outbox_state = [], {}
+        if not messages:
+            if state:
+                self._stats['messages_sent'] += 1
+                DOMWidget.send_state(self, key=list(state))
+            return
+
+        if len(messages) == 1 and not state:
+            content = messages[0]
+        else:
+            content = {'type': 'batch', 'messages': messages, 'state': state}
+            # Sent as one instead of a message each and a state update
+            self._stats['messages_merged'] += len(messages) + bool(state) - 1
+        self._stats['messages_sent'] += 1
+        self.send(content)
+
+    def get_diff_image(self):
+        # Same as FigureCanvasWebAggCore.get_diff_image, encoding the frame
+        # with the canvas image codec
+        if self._png_is_old:
+            start = time.perf_counter()
+            renderer = self.get_renderer()
+
+            pixels = np.asarray(renderer.buffer_rgba())
+            # The buffer is created as type uint32 so that entire
+            # pixels can be compared in one numpy call, rather than
+            # needing to compare each plane separately.
+            buff = pixels.view(np.uint32).squeeze(2)
+
+            mime, alpha = _image_codecs[self.image_codec]
+            blit = (
+                self._blit_regions
+                and not self._force_full
+                and buff.shape == self._last_buff.shape
+                # The blitted regions replace what was there before
+                and all(
+                    (pixels[y : y + h, x : x + w, 3] == 255).all()
+                    for x, y, w, h in self._blit_regions
+                )
+            )
+            if blit:
+                self.set_image_mode('diff')
+                # Only the blitted regions changed, no need to compare the
+                # whole buffer with the previous one.
+                regions = self._blit_regions
+                tiles = [buff[y : y + h, x : x + w] for x, y, w, h in regions]
+                for (x, y, w, h), tile in zip(regions, tiles):
+                    self._last_buff[y : y + h, x : x + w] = tile
+            elif (
+                self._force_full
+                # If the buffer has changed size we need to do a full draw.
+                or buff.shape != self._last_buff.shape
+                # If any pixels have transparency, we need to force a full
+                # draw as we cannot overlay new on top of old.
+                or (pixels[:, :, 3] != 255).any()
+                # Diff frames are transparent where nothing changed
+                or not alpha
+            ):
+                self.set_image_mode('full')
+                height, width = buff.shape
+                regions = [(0, 0, width, height)]
+                tiles = [buff]
+            else:
+                self.set_image_mode('diff')
+                # Only send the regions that changed
+                diff = buff != self._last_buff
+                regions = _changed_regions(diff)
+                tiles = [
+                    np.where(diff[y : y + h, x : x + w], buff[y : y + h, x : x + w], 0)
+                    for x, y, w, h in regions
+                ]
+
+            # Store the current buffer so we can compute the next diff.
+            if not blit:
+                self._last_buff = buff.copy()
+            self._blit_regions = []
+            self._force_full = False
+            self._png_is_old = False
+
+            self._frame_header = {
+                'type': 'binary',
+                'mime': mime,
+                'mode': self._current_image_mode,
+                'tiles': regions,
+            }
+            codec = (self.image_codec, self.image_quality, self.image_compression)
+            if not self.threaded_encoding or _running_loop() is None:
+                data = _encode_tiles(tiles, *codec)
+                self._record_timing('encode_ms', start)
+                return data
+
+            # The renderer buffer is overwritten by the next draw
+            tiles = [np.array(tile) for tile in tiles]
+            elapsed = time.perf_counter() - start
+
+            def encode():
+                start = time.perf_counter() - elapsed
+                data = _encode_tiles(tiles, *codec)
+                self._record_timing('encode_ms', start)
+                return data
+
+            return _get_encoder().submit(encode)
 
     def send_binary(self, data):
         # TODO we should maybe rework the FigureCanvasWebAggCore implementation
         # so that it has a "refresh" method that we can overwrite
 
-        # Update _data_url
+        if isinstance(data, Future):
+            # The frame is encoded in the background, it is sent from the
+            # event loop once it and the frames before it are encoded.
+            loop = asyncio.get_running_loop()
+
+            def on_encoded(future):
+                try:
+                    loop.call_soon_threadsafe(self._send_pending_frames)
+                except RuntimeError:
+                    # The event loop is closed
+                    pass
+
+            self._pending_frames.append((data, self._frame_header, self.image_codec))
+            data.add_done_callback(on_encoded)
+        else:
+            self._send_frame_data(data, self._frame_header, self.image_codec)
+
+    def _send_pending_frames(self):
+        while self._pending_frames and self._pending_frames[0][0].done():
+            future, header, codec = self._pending_frames.popleft()
+            self._send_frame_data(future.result(), header, codec)
+
+    def _send_frame_data(self, data, header, codec):
+        # data holds one encoded buffer per region of the frame
+
+        # Mark _data_url as out of date, it is only encoded when the widget
+        # state is requested. Full PNG frames are the PNG of _last_buff, so we
+        # keep them around instead of encoding the same image a second time.
         if self.syncing_data_url:
-            data = self._last_buff.view(dtype=np.uint8).reshape(
-                (*self._last_buff.shape, 4)
-            )
-            with io.BytesIO() as png:
-                Image.fromarray(data).save(png, format="png")
-                self._data_url = b64encode(png.getvalue()).decode('utf-8')
+            full = header['mode'] == 'full'
+            png = codec == 'png'
+            latest = not self._pending_frames
+            self._last_png = data[0] if full and png and latest else None
+            self._data_url_is_old = True
 
         # Actually send the data
-        self.send({'data': '{"type": "binary"}'}, buffers=[data])
+        self._stats['frames_sent'] += 1
+        frame_bytes = sum(len(buffer) for buffer in data)
+        self._stats['bytes_sent'] += frame_bytes
+        self._timings['frame_bytes'].append(frame_bytes)
+
+        start = time.perf_counter()
+        self._send_message(header, buffers=data)
+        self._record_timing('send_ms', start)
+
+        # The front-end accepts draw requests again once it has the frame
+        self._draw_requested = False
+        if self._draw_after_frame and not self._pending_frames:
+            self._draw_after_frame = False
+            self.draw_idle()
 
     def download(self):
         """
@@ -378,31 +1884,582 @@ class Canvas(DOMWidget, FigureCanvasWebAggCore):
         >>> # Download with custom DPI
         >>> plt.rcParams['savefig.dpi'] = 300
         >>> fig.canvas.download()
+
+        The file is sent in chunks of ``download_chunk_size`` bytes, from the
+        event loop when there is a running one. The saved file is reused
+        while the figure and the savefig rcParams do not change.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the size of the file once it is sent. Cancelling it
+            stops the download.
         """
-        self._send_save_buffer()
+        return self._send_save_buffer()
+
+    def cancel_download(self):
+        """Stop sending the file of the download in progress, if any."""
+        if self._download is not None:
+            self._download[2].cancel()
 
     def _send_save_buffer(self):
         """Generate figure buffer respecting savefig rcParams and send to frontend."""
-        buf = io.BytesIO()
+        self.cancel_download()
+
+        # Get the format that will be used
+        fmt = rcParams.get('savefig.format', 'png')
+
+        self._download_id += 1
+        future = Future()
+        download = self._download = (self._download_id, fmt, future)
+
+        key = self._download_key()
+        cache = self._download_cache
+        if (
+            cache is not None
+            and cache[:2] == (key, self._live_draws)
+            and not self.figure.stale
+        ):
+            self._stats['download_cache_hits'] += 1
+            self._send_download(download, cache[2])
+            return future
+
+        # Saved on the kernel thread: savefig temporarily replaces the canvas
+        # and DPI of the figure, which user code and events would see
+        self._send_download(download, self._save_figure(key))
+        return future
+
+    def _download_key(self):
+        return repr(
+            sorted(
+                (name, value)
+                for name, value in rcParams.items()
+                if name.startswith('savefig.')
+            )
+        )
+
+    def _save_figure(self, key):
+        """Save the figure respecting savefig rcParams, and cache the file."""
+        was_stale = self.figure.stale
 
+        buf = io.BytesIO()
         # Call savefig WITHOUT any parameters - fully respects all rcParams
         self.figure.savefig(buf)
+        data = buf.getvalue()
 
-        # Get the format that was used
-        fmt = rcParams.get('savefig.format', 'png')
+        # The renderer may now hold the figure at the savefig DPI, or nothing
+        self._renderer_is_current = False
+        self._snapshot = None
+        # savefig leaves the figure stale, though it did not change
+        if not was_stale:
+            self.figure.stale = False
+            self._download_cache = (key, self._live_draws, data)
+        return data
 
-        # Get the buffer data
-        data = buf.getvalue()
+    def _send_download(self, download, data):
+        """Send the file in chunks, from the event loop if there is one."""
+        download_id, fmt, future = download
+        chunk_size = self.download_chunk_size
+        chunks = max(1, -(-len(data) // chunk_size))
+        loop = _running_loop()
+
+        def send_chunk(i):
+            msg_data = {"type": "save", "format": fmt}
+            if chunks > 1:
+                msg_data.update(id=download_id, chunk=i, chunks=chunks)
+
+            if future.cancelled():
+                if i > 0:
+                    # Let the front-end drop the chunks it received
+                    msg_data['cancelled'] = True
+                    self._send_message(msg_data)
+                return False
+
+            # Send to frontend with format metadata
+            if chunks == 1:
+                chunk = data
+            else:
+                chunk = memoryview(data)[i * chunk_size : (i + 1) * chunk_size]
+            self._send_message(msg_data, buffers=[chunk])
+            self.download_progress = (i + 1) / chunks
+
+            if i + 1 == chunks:
+                self._stats['downloads_sent'] += 1
+                self._stats['download_bytes'] += len(data)
+                future.set_result(len(data))
+                return False
+            if loop is not None:
+                # Let the kernel handle other messages in between
+                loop.call_soon(send_chunk, i + 1)
+                return False
+            return True
+
+        self.download_progress = 0
+        i = 0
+        while send_chunk(i):
+            i += 1
+
+    def new_timer(self, *args, **kwargs):
+        return _AnimationTimer(self, *args, **kwargs)
+
+    def stream_animation(self, animation):
+        """
+        Play an animation of the figure from frames rendered ahead.
+
+        Instead of drawing a frame on every tick of the timer of the
+        animation, its frames are rendered ahead, up to
+        ``animation_lookahead`` frames and ``animation_max_bytes``, sent in
+        batches and played by the front-end at the interval of the animation.
+        Kernel stalls shorter than the lookahead do not show up in the
+        playback. The frames are encoded with ``image_codec``, in the
+        background with ``threaded_encoding``.
+
+        Parameters
+        ----------
+        animation : matplotlib.animation.TimedAnimation
+            An animation of the figure, e.g. a ``FuncAnimation``. Its timer
+            is stopped.
+        """
+        self.stop_animation()
+        if animation.event_source is not None:
+            animation.event_source.stop()
+        # Do not let the next draw of the figure start the timer, and disable
+        # the "Animation was deleted without rendering" warning, as
+        # Animation.save does
+        self.mpl_disconnect(animation._first_draw_id)
+        animation._draw_was_started = True
+        self._animation_id += 1
+        self._animation_stream = _AnimationStream(self, animation, self._animation_id)
+        self._stats['animations'] += 1
+        self._animation_stream.fill()
+
+    def stop_animation(self):
+        """Stop streaming the animation, see ``stream_animation``."""
+        stream = self._animation_stream
+        self._animation_stream = None
+        if stream is None:
+            return
+        if not stream.done:
+            stream.stop()
+            # The front-end shows a frame the kernel rendered frames ago
+            self.draw_idle()
+
+    @property
+    def _is_deferred(self):
+        """Whether frames are not rendered until the figure state is needed."""
+        if self.headless is None:
+            return self.syncing_data_url
+        return self.headless
+
+    def _render_deferred_frame(self):
+        """Render the figure with Agg, if its rendering was deferred."""
+        if not self._render_deferred:
+            return
+        self._render_deferred = False
+        self._stats['frames_rendered'] += 1
+        self._draw_start = time.perf_counter()
+        try:
+            # Under pyplot's interactive mode, the artists made stale by the
+            # draw would defer the figure again through draw_idle
+            with self._idle_draw_cntx():
+                FigureCanvasAgg.draw(self)
+        finally:
+            self._draw_start = None
+        # Frames sent from now on, and the state, need the new render
+        self._png_is_old = True
+        self._force_full = True
+        self._frame_deferred = True
+
+    def draw(self):
+        if self._is_deferred:
+            # An explicit draw updates the Agg buffer, e.g. for buffer_rgba or
+            # copy_from_bbox, only sending the frame is deferred
+            self._render_deferred = True
+            self._render_deferred_frame()
+            buffer_budget.touch(self)
+            return
+        self._stats['frames_rendered'] += 1
+        if self._interaction is not None:
+            self._stats['interaction_frames'] += 1
+        self._draw_start = time.perf_counter()
+        try:
+            FigureCanvasWebAggCore.draw(self)
+        finally:
+            self._draw_start = None
+        buffer_budget.touch(self)
+
+    def draw_idle(self):
+        if self._is_deferred:
+            self._render_deferred = True
+            self._stats['frames_deferred'] += 1
+            return
+        # Coalesce draw requests until the frame requested is sent: the
+        # front-end ignores them while it waits for it
+        if self._draw_requested:
+            self._stats['frames_dropped'] += 1
+            # The frame encoded in the background misses this change
+            self._draw_after_frame |= bool(self._pending_frames)
+            return
+        self._draw_requested = True
+        FigureCanvasWebAggCore.draw_idle(self)
+
+    def handle_draw(self, event):
+        self._schedule_frame(draw=True)
+
+    def handle_refresh(self, event):
+        # A new front-end needs a frame, whatever was requested before
+        self._draw_requested = False
+        FigureCanvasWebAggCore.handle_refresh(self, event)
+
+    def _schedule_frame(self, draw=False):
+        """
+        Send a frame to the front-end now, or once ``max_fps`` allows it.
+
+        Parameters
+        ----------
+        draw : bool
+            Whether the figure needs to be rendered before sending the frame.
+        """
+        if self._is_deferred:
+            self._render_deferred = True
+            return
+
+        if self._frame_timer is not None:
+            # This frame supersedes the one already waiting
+            self._stats['frames_dropped'] += 1
+            self._frame_needs_draw |= draw
+            return
+
+        if self.max_fps > 0:
+            delay = self._last_frame_time + 1 / self.max_fps - time.monotonic()
+            if delay > 0:
+                self._frame_timer = _call_later(delay, self._send_scheduled_frame)
+                if self._frame_timer is not None:
+                    self._frame_needs_draw = draw
+                    return
+
+        if draw:
+            self.draw()
+        else:
+            self._send_frame()
 
-        # Send to frontend with format metadata
-        msg_data = {
-            "type": "save",
-            "format": fmt
+    def _send_scheduled_frame(self):
+        self._frame_timer = None
+        draw, self._frame_needs_draw = self._frame_needs_draw, False
+        if draw:
+            self.draw()
+        else:
+            self._send_frame()
+
+    def _send_frame(self):
+        self._last_frame_time = time.monotonic()
+        FigureManagerWebAgg.refresh_all(self.manager)
+
+    def frame_stats(self):
+        """
+        Return the number of frames rendered, sent to the front-end, and
+        dropped because a newer frame superseded them.
+        """
+        return {
+            'rendered': self._stats['frames_rendered'],
+            'sent': self._stats['frames_sent'],
+            'dropped': self._stats['frames_dropped'],
         }
-        self.send({'data': json.dumps(msg_data)}, buffers=[data])
 
-    def new_timer(self, *args, **kwargs):
-        return TimerTornado(*args, **kwargs)
+    def _record_timing(self, name, start):
+        self._timings[name].append((time.perf_counter() - start) * 1000)
+
+    def _record_frontend_timings(self, timings):
+        """Record the timings, in ms, piggybacked on front-end messages."""
+        if not isinstance(timings, dict):
+            return
+        for name in _frontend_timings:
+            samples = timings.get(name, [])
+            self._timings[name].extend(float(sample) for sample in samples)
+
+    @property
+    def stats(self):
+        """
+        Performance statistics of the canvas.
+
+        Counters since the canvas was created: frames rendered, sent and
+        dropped, bytes sent, snapshot cache hits and misses, size of the
+        snapshot saved in the widget state (see ``state_info``), downloads sent
+        and reused from the last one, memory taken by the buffers and
+        reclaimed by releasing them (see ``buffer_budget``), and messages
+        received from the front-end per type and how many motion and scroll
+        events were merged, comm messages sent to the front-end and how many
+        more would have been sent without batching those of an event
+        together, the number of interactions and of frames
+        rendered at ``interaction_scale`` during them, and the number of
+        streamed animations and of their frames and bytes sent. Along with
+        the count, mean, max and last value of the most recent samples of:
+
+        - ``draw_ms``: rendering the figure with Agg
+        - ``encode_ms``: computing and encoding the frame
+        - ``send_ms``: sending the frame over the comm
+        - ``frame_bytes``: the size of the encoded frame
+        - ``decode_ms``, ``paint_ms``: decoding and drawing the frame in the
+          front-end
+        - ``round_trip_ms``: from the draw request of the front-end to the
+          frame being drawn
+        - ``event_round_trip_ms``: from a motion or scroll event to the next
+          frame being drawn, which the adaptive throttle follows
+        - ``queue_ms``: how long the messages of the front-end waited before
+          the kernel handled them, compared to the fastest one
+
+        The front-end timings are sent along with its draw requests, they
+        lag behind the kernel ones.
+        """
+        stats = {
+            'frames': self.frame_stats(),
+            'bytes_sent': self._stats['bytes_sent'],
+            'snapshot': self.snapshot_cache_info(),
+            'downloads': {
+                'sent': self._stats['downloads_sent'],
+                'cache_hits': self._stats['download_cache_hits'],
+                'bytes': self._stats['download_bytes'],
+            },
+            'buffers': {
+                'bytes': self._buffer_bytes(),
+                'released': self._stats['buffers_released'],
+                'reclaimed_bytes': self._stats['bytes_reclaimed'],
+            },
+            'events': dict(self._events),
+            'messages': {
+                'sent': self._stats['messages_sent'],
+                'merged': self._stats['messages_merged'],
+            },
+            'state': self.state_info(),
+            'events_coalesced': self._stats['events_coalesced'],
+            'frames_deferred': self._stats['frames_deferred'],
+            'interactions': {
+                'count': self._stats['interactions'],
+                'frames': self._stats['interaction_frames'],
+            },
+            'animations': {
+                'count': self._stats['animations'],
+                'frames': self._stats['animation_frames'],
+                'bytes': self._stats['animation_bytes'],
+            },
+            'lock': self.manager._lock.stats() if self.manager else None,
+        }
+        for name in ('draw_ms', 'encode_ms', 'send_ms', 'frame_bytes', 'queue_ms'):
+            stats[name] = _summarize(self._timings[name])
+        for name in _frontend_timings:
+            stats[name] = _summarize(self._timings[name])
+        return stats
+
+    def blit(self, bbox=None):
+        # The renderer now holds more than the figure draw
+        self._snapshot = None
+        self._renderer_is_current = False
+
+        # Only send the blitted region, unless the whole canvas changed since
+        # the last frame
+        if bbox is None:
+            self._blit_regions = None
+        elif self._blit_regions is not None:
+            region = self._bbox_to_region(bbox)
+            if region is not None:
+                self._blit_regions.append(region)
+            if len(self._blit_regions) > 16:
+                self._blit_regions = None
+
+        FigureCanvasWebAggCore.blit(self, bbox)
+
+    def _bbox_to_region(self, bbox):
+        """
+        Return the (x, y, width, height) pixels of the buffer covered by a
+        display coordinates bbox, or None if it is empty.
+        """
+        renderer = self.get_renderer()
+        width, height = int(renderer.width), int(renderer.height)
+        x0 = max(int(np.floor(bbox.x0)), 0)
+        x1 = min(int(np.ceil(bbox.x1)), width)
+        # Display coordinates start from the bottom
+        y0 = max(height - int(np.ceil(bbox.y1)), 0)
+        y1 = min(height - int(np.floor(bbox.y0)), height)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def _on_draw_event(self, event):
+        # The frame is sent to the front-end after the draw_event
+        if self._draw_start is not None:
+            self._record_timing('draw_ms', self._draw_start)
+            self._draw_start = None
+
+        self._snapshot = None
+        self._blit_regions = None
+        # Saving to other formats draws the figure with a different renderer
+        self._renderer_is_current = event.renderer is getattr(self, 'renderer', None)
+        if self._renderer_is_current:
+            self._live_draws += 1
+
+    def _buffer_bytes(self):
+        """Memory taken by the renderer, the last frame and cached files."""
+        size = self._last_buff.nbytes
+        renderer = getattr(self, 'renderer', None)
+        if renderer is not None:
+            size += int(renderer.width) * int(renderer.height) * 4
+        if self._snapshot is not None:
+            size += len(self._snapshot[1])
+        if self._download_cache is not None:
+            size += len(self._download_cache[2])
+        return size
+
+    def _can_release_buffers(self):
+        """Whether the buffers are not needed by a frame being sent."""
+        return not (
+            self._png_is_old
+            or self._draw_start is not None
+            or self._frame_timer is not None
+            or self._pending_frames
+        )
+
+    def _is_out_of_view(self):
+        """Whether the front-ends were closed, or are all scrolled away."""
+        if not self._client_ratios:
+            return self._events['closing'] > 0
+        return self._client_ratios.keys() <= self._hidden_clients
+
+    def _release_buffers(self):
+        """
+        Free the renderer and the last frame, and return how many bytes it
+        reclaimed. The next draw rebuilds them and sends a full frame.
+        """
+        # The widget state still needs the last frame
+        self._update_data_url()
+
+        size = self._buffer_bytes()
+        # Rebuilt by get_renderer, or by _restore_buffers
+        if hasattr(self, 'renderer'):
+            del self.renderer
+        self._lastKey = None
+        self._last_buff = np.empty((0, 0))
+        self._force_full = True
+        self._blit_regions = None
+        self._renderer_is_current = False
+        self._snapshot = None
+        self._download_cache = None
+
+        self._stats['buffers_released'] += 1
+        self._stats['bytes_reclaimed'] += size
+        return size
+
+    def _restore_buffers(self):
+        """Render the figure again if its buffers were released."""
+        if getattr(self, 'renderer', None) is None:
+            self._stats['frames_rendered'] += 1
+            FigureCanvasAgg.draw(self)
+
+    def buffer_rgba(self):
+        self._restore_buffers()
+        return FigureCanvasAgg.buffer_rgba(self)
+
+    def tostring_argb(self):
+        self._restore_buffers()
+        return FigureCanvasAgg.tostring_argb(self)
+
+    def copy_from_bbox(self, bbox):
+        self._restore_buffers()
+        return FigureCanvasAgg.copy_from_bbox(self, bbox)
+
+    def _snapshot_key(self):
+        return (
+            tuple(self.figure.bbox.size),
+            self.figure.dpi,
+            self.device_pixel_ratio,
+        )
+
+    def _snapshot_is_valid(self):
+        """Whether the Agg buffer is what savefig would produce."""
+        return (
+            self._renderer_is_current
+            and not self.figure.stale
+            # Otherwise the buffer is rendered at another DPI than the figure's
+            and self.device_pixel_ratio == 1
+            and not rcParams['savefig.transparent']
+            and rcParams['savefig.bbox'] != 'tight'
+            and rcParams['savefig.facecolor'] == 'auto'
+            and rcParams['savefig.edgecolor'] == 'auto'
+        )
+
+    def _snapshot_source(self):
+        """
+        Return the key and the Agg buffer of the snapshot to encode, or None
+        if it is cached already or the buffer cannot be reused.
+        """
+        if not self._snapshot_is_valid():
+            return None
+        key = self._snapshot_key()
+        if self._snapshot is not None and self._snapshot[0] == key:
+            return None
+        return key, np.asarray(self.get_renderer().buffer_rgba())
+
+    def _get_snapshot_png(self):
+        """
+        Return the figure as a PNG, at the figure DPI.
+
+        The last rendered Agg buffer is reused when the figure did not change
+        since, otherwise the figure is rendered with ``savefig``.
+        """
+        self._render_deferred_frame()
+        if self._snapshot_is_valid():
+            self._stats['snapshot_hits'] += 1
+            source = self._snapshot_source()
+            if source is not None:
+                key, data = source
+                self._snapshot = (key, _encode_image(data))
+            return self._snapshot[1]
+
+        self._stats['snapshot_misses'] += 1
+        buf = io.BytesIO()
+        self.figure.savefig(buf, format='png', dpi='figure')
+        return buf.getvalue()
+
+    def _get_snapshot_rgba(self):
+        """
+        Return the figure as an RGBA array, at the figure DPI.
+
+        Like ``_get_snapshot_png``, the last rendered Agg buffer is reused when
+        the figure did not change since.
+        """
+        self._render_deferred_frame()
+        if self._snapshot_is_valid():
+            self._stats['snapshot_hits'] += 1
+            return np.asarray(self.get_renderer().buffer_rgba())
+
+        self._stats['snapshot_misses'] += 1
+        from PIL import Image
+
+        buf = io.BytesIO()
+        self.figure.savefig(buf, format='png', dpi='figure')
+        return np.asarray(Image.open(buf).convert('RGBA'))
+
+    def state_info(self):
+        """
+        Return the size of the snapshot saved in the widget state: the
+        ``_data_url`` and its image, and whether it references the identical
+        snapshot of another figure instead.
+        """
+        data_url = self._data_url or ''
+        return {
+            'bytes': len(data_url),
+            'image_bytes': len(self._state_image[1]) if self._state_image else 0,
+            'deduplicated': data_url.startswith(_data_url_ref),
+        }
+
+    def snapshot_cache_info(self):
+        """
+        Return how often displaying or exporting the figure reused the last
+        rendered frame (hits) instead of rendering it again (misses).
+        """
+        return {
+            'hits': self._stats['snapshot_hits'],
+            'misses': self._stats['snapshot_misses'],
+        }
 
     def _repr_mimebundle_(self, **kwargs):
         # now happens before the actual display call.
@@ -412,11 +2469,14 @@ class Canvas(DOMWidget, FigureCanvasWebAggCore):
         if len(plaintext) > 110:
             plaintext = plaintext[:110] + '…'
 
-        buf = io.BytesIO()
-        self.figure.savefig(buf, format='png', dpi='figure')
-
-        base64_image = b64encode(buf.getvalue()).decode('utf-8')
-        self._data_url = f'data:image/png;base64,{base64_image}'
+        if self.state_max_pixels or self.state_image_codec != 'png':
+            mime, image = self._encode_state_image(self._get_snapshot_rgba())
+        else:
+            mime, image = 'image/png', self._get_snapshot_png()
+        base64_image = b64encode(image).decode('utf-8')
+        data_url = f'data:{mime};base64,{base64_image}'
+        self._set_state_image(mime, image)
+        self._data_url_is_old = False
         # Figure size in pixels
         pwidth = self.figure.get_figwidth() * self.figure.get_dpi()
         pheight = self.figure.get_figheight() * self.figure.get_dpi()
@@ -435,7 +2495,7 @@ class Canvas(DOMWidget, FigureCanvasWebAggCore):
                 <img src='{}' width={}/>
             </div>
         """.format(
-            self._figure_label, self._data_url, width
+            self._figure_label, data_url, width
         )
 
         # Update the widget model properly for HTML embedding
@@ -443,7 +2503,7 @@ class Canvas(DOMWidget, FigureCanvasWebAggCore):
 
         data = {
             'text/plain': plaintext,
-            'image/png': base64_image,
+            mime: base64_image,
             'text/html': html,
             'application/vnd.jupyter.widget-view+json': {
                 'version_major': 2,
@@ -474,14 +2534,21 @@ class FigureManager(FigureManagerWebAgg):
         FigureManagerWebAgg.__init__(self, canvas, num)
         self.web_sockets = [self.canvas]
         self.toolbar = Toolbar(self.canvas)
+        # Held while displaying the figure, so that figures are displayed
+        # concurrently from several threads
+        self._lock = _InstrumentedLock()
+
+    def refresh_all(self):
+        # Frames go through the canvas scheduler, which respects max_fps
+        self.canvas._schedule_frame()
 
     def show(self):
-        if self.canvas._closed:
-            self.canvas._closed = False
-            with _lock:
+        with self._lock:
+            if self.canvas._closed:
+                self.canvas._closed = False
                 display(self.canvas)
-        else:
-            self.canvas.draw_idle()
+                return
+        self.canvas.draw_idle()
 
     def destroy(self):
         self.canvas.close()
@@ -497,26 +2564,28 @@ class _Backend_ipympl(_Backend):
 
     @staticmethod
     def new_figure_manager_given_figure(num, figure):
-        with _lock:
-            canvas = Canvas(figure)
-            if 'nbagg.transparent' in rcParams and rcParams['nbagg.transparent']:
-                figure.patch.set_alpha(0)
-            manager = FigureManager(canvas, num)
+        canvas = Canvas(figure)
+        if 'nbagg.transparent' in rcParams and rcParams['nbagg.transparent']:
+            figure.patch.set_alpha(0)
+        manager = FigureManager(canvas, num)
 
-            if is_interactive():
+        if is_interactive():
+            with _gcf_lock:
                 _Backend_ipympl._to_show.append(figure)
-                figure.canvas.draw_idle()
+            figure.canvas.draw_idle()
 
-            def destroy(event):
-                canvas.mpl_disconnect(cid)
+        def destroy(event):
+            canvas.mpl_disconnect(cid)
+            with _gcf_lock:
                 Gcf.destroy(manager)
 
-            cid = canvas.mpl_connect('close_event', destroy)
+        cid = canvas.mpl_connect('close_event', destroy)
 
-            # Only register figure for showing when in interactive mode (otherwise
-            # we'll generate duplicate plots, since a user who set ioff() manually
-            # expects to make separate draw/show calls).
-            if is_interactive():
+        # Only register figure for showing when in interactive mode (otherwise
+        # we'll generate duplicate plots, since a user who set ioff() manually
+        # expects to make separate draw/show calls).
+        if is_interactive():
+            with _gcf_lock:
                 # ensure current figure will be drawn.
                 try:
                     _Backend_ipympl._to_show.remove(figure)
@@ -527,56 +2596,107 @@ class _Backend_ipympl(_Backend):
                 _Backend_ipympl._to_show.append(figure)
                 _Backend_ipympl._draw_called = True
 
-            return manager
+        return manager
 
     @staticmethod
     def show(block=None):
-        with _lock:
-            # # TODO: something to do when keyword block==False ?
-            interactive = is_interactive()
+        # # TODO: something to do when keyword block==False ?
+        interactive = is_interactive()
 
+        with _gcf_lock:
             manager = Gcf.get_active()
-            if manager is None:
-                return
+        if manager is None:
+            return
 
-            try:
+        try:
+            with manager._lock:
                 display(manager.canvas)
-                # metadata=_fetch_figure_metadata(manager.canvas.figure)
+            # metadata=_fetch_figure_metadata(manager.canvas.figure)
 
-                # plt.figure adds an event which makes the figure in focus the
-                # active one. Disable this behaviour, as it results in
-                # figures being put as the active figure after they have been
-                # shown, even in non-interactive mode.
-                if hasattr(manager, '_cidgcf'):
-                    manager.canvas.mpl_disconnect(manager._cidgcf)
+            # plt.figure adds an event which makes the figure in focus the
+            # active one. Disable this behaviour, as it results in
+            # figures being put as the active figure after they have been
+            # shown, even in non-interactive mode.
+            if hasattr(manager, '_cidgcf'):
+                manager.canvas.mpl_disconnect(manager._cidgcf)
 
-                if not interactive:
+            if not interactive:
+                with _gcf_lock:
                     Gcf.figs.pop(manager.num, None)
-            finally:
+        finally:
+            with _gcf_lock:
                 if manager.canvas.figure in _Backend_ipympl._to_show:
                     _Backend_ipympl._to_show.remove(manager.canvas.figure)
 
 
 def flush_figures():
-    with _lock:
-        backend = matplotlib.get_backend()
-        if backend in ('widget', 'ipympl', 'module://ipympl.backend_nbagg'):
-            if not _Backend_ipympl._draw_called:
-                return
-
-            try:
-                # exclude any figures that were closed:
-                active = {fm.canvas.figure for fm in Gcf.get_all_fig_managers()}
-                for fig in [fig for fig in _Backend_ipympl._to_show if fig in active]:
-                    # display(fig.canvas, metadata=_fetch_figure_metadata(fig))
-                    display(fig.canvas)
-            finally:
-                # clear flags for next round
-                _Backend_ipympl._to_show = []
-                _Backend_ipympl._draw_called = False
-
-
-with _lock:
+    backend = matplotlib.get_backend()
+    if backend not in ('widget', 'ipympl', 'module://ipympl.backend_nbagg'):
+        return
+
+    with _gcf_lock:
+        managers = Gcf.get_all_fig_managers()
+        to_show = []
+        if _Backend_ipympl._draw_called:
+            # exclude any figures that were closed:
+            active = {fm.canvas.figure: fm for fm in managers}
+            to_show = [active[fig] for fig in _Backend_ipympl._to_show if fig in active]
+            # clear flags for next round
+            _Backend_ipympl._to_show = []
+            _Backend_ipympl._draw_called = False
+
+    # Figures without a front-end only sync their _data_url once per
+    # cell execution, so that it ends up in the saved widget state.
+    managers = [manager for manager in managers if isinstance(manager.canvas, Canvas)]
+    shown = {id(manager) for manager in to_show}
+
+    def encode(manager, state_source, snapshot_source):
+        canvas = manager.canvas
+        state_image = snapshot = None
+        with manager._lock:
+            if state_source is not None:
+                state_image = canvas._encode_state_image(*state_source)
+            if snapshot_source is not None:
+                key, data = snapshot_source
+                snapshot = (key, _encode_image(data))
+        return state_image, snapshot
+
+    if min(render_workers, len(managers)) > 1:
+        # The figures are rendered on the kernel thread: draw_event callbacks,
+        # e.g. starting the timer of an animation, expect to run there. Only
+        # their snapshots are encoded on other threads, the image encoders
+        # release the GIL, and deduplicated across figures afterwards.
+        state_sources = []
+        snapshot_sources = []
+        for manager in managers:
+            with manager._lock:
+                state_sources.append(manager.canvas._data_url_source())
+                # Cached for displaying the figure
+                snapshot_sources.append(
+                    manager.canvas._snapshot_source() if id(manager) in shown else None
+                )
+        encoded = _get_render_pool().map(
+            encode, managers, state_sources, snapshot_sources
+        )
+        for manager, (state_image, snapshot) in zip(managers, list(encoded)):
+            with manager._lock:
+                if state_image is not None:
+                    manager.canvas._set_state_image(*state_image)
+                if snapshot is not None:
+                    manager.canvas._snapshot = snapshot
+    else:
+        for manager in managers:
+            with manager._lock:
+                manager.canvas._update_data_url()
+    buffer_budget.enforce()
+
+    for manager in to_show:
+        with manager._lock:
+            # display(fig.canvas, metadata=_fetch_figure_metadata(fig))
+            display(manager.canvas)
+
+
+with _gcf_lock:
     ip = get_ipython()
     if ip is not None:
         ip.events.register('post_execute', flush_figures)
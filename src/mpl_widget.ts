@@ -1,11 +1,10 @@
-import { throttle } from 'lodash';
-
 import {
     DOMWidgetModel,
     DOMWidgetView,
     WidgetModel,
     ISerializers,
     unpack_models,
+    uuid,
 } from '@jupyter-widgets/base';
 
 import * as utils from './utils';
@@ -14,14 +13,84 @@ import { MODULE_VERSION } from './version';
 
 import { ToolbarView } from './toolbar_widget';
 
+// MIME type of the 'raw-zlib' frames: zlib compressed RGBA pixels
+const RAW_ZLIB_MIME = 'application/x-ipympl-rgba-zlib';
+
+// The _data_url of a figure whose snapshot is the same as the one of another
+// figure is this prefix followed by the model id of the other figure
+const DATA_URL_REF = 'ipympl-ref:';
+
+// MIME types of the snapshots saved in the widget state, by codec
+const STATE_IMAGE_MIMES: { [codec: string]: string } = {
+    jpeg: 'image/jpeg',
+    webp: 'image/webp',
+};
+
+type Frame = ImageBitmap | HTMLImageElement | HTMLCanvasElement;
+
+// An animation streamed by the kernel, see handle_animation
+interface AnimationPlayback {
+    id: number;
+    mime: string;
+    width: number;
+    height: number;
+    // Encoded frames waiting to be shown, with the ms to wait before each
+    frames: { buffer: Uint8Array; delay: number }[];
+    // The next frame, once decoded, and whether it is being decoded
+    next: Frame | null;
+    decoding: boolean;
+    // When the last frame was shown
+    shown_time: number | null;
+    // Frames shown since the last ones were reported to the kernel, which
+    // reports them every `ack` frames
+    played: number;
+    ack: number;
+    ended: boolean;
+    request: number | null;
+}
+
+// Maximum number of timing samples waiting to be sent to the kernel
+const MAX_TIMING_SAMPLES = 100;
+
+// The figure holding each snapshot in its _data_url
+const state_images: Map<string, MPLCanvasModel> = new Map();
+
+function empty_timings(): { [name: string]: number[] } {
+    return {
+        decode_ms: [],
+        paint_ms: [],
+        round_trip_ms: [],
+        event_round_trip_ms: [],
+    };
+}
+
 export class MPLCanvasModel extends DOMWidgetModel {
     offscreen_canvas: HTMLCanvasElement;
     offscreen_context: CanvasRenderingContext2D;
     requested_size: Array<number> | null;
     resize_requested: boolean;
     ratio: number;
+    client_id: string;
     waiting_for_image: boolean;
     image: HTMLImageElement;
+    frame_queue: Promise<void>;
+    draw_request_time: number | null;
+    frame_timings: { [name: string]: number[] };
+    // DPI ratio of the frame in the offscreen canvas
+    offscreen_ratio: number;
+    event_time: number | null;
+    event_round_trip: number | null;
+    download_chunks: Map<number, (ArrayBuffer | ArrayBufferView)[]>;
+    message_before_download: string;
+    visible_views: Set<string>;
+    visible: boolean;
+    data_url_is_old: boolean;
+    // Snapshot of the last _data_url, and the figure it references if any
+    state_image: string | null;
+    state_owner: MPLCanvasModel | null;
+    animation: AnimationPlayback | null;
+    // Zoom rectangle [x, y, width, height] drawn over the figure
+    rubberband: number[];
 
     defaults() {
         return {
@@ -40,16 +109,19 @@ export class MPLCanvasModel extends DOMWidgetModel {
             resizable: true,
             capture_scroll: false,
             pan_zoom_throttle: 33,
+            adaptive_throttle: false,
+            min_pan_zoom_throttle: 16,
+            max_pan_zoom_throttle: 500,
+            state_max_pixels: 0,
+            state_image_codec: 'png',
+            state_image_quality: 85,
+            dedup_state: false,
             _data_url: null,
             _size: [0, 0],
             _figure_label: 'Figure',
             _message: '',
             _cursor: 'pointer',
             _image_mode: 'full',
-            _rubberband_x: 0,
-            _rubberband_y: 0,
-            _rubberband_width: 0,
-            _rubberband_height: 0,
         };
     }
 
@@ -78,9 +150,24 @@ export class MPLCanvasModel extends DOMWidgetModel {
         this.requested_size = null;
         this.resize_requested = false;
         this.ratio = (window.devicePixelRatio || 1) / backingStore;
+        // Identifies this front-end among the ones displaying the figure
+        this.client_id = uuid();
 
         this.resize_canvas();
 
+        this.frame_queue = Promise.resolve();
+        this.draw_request_time = null;
+        this.frame_timings = empty_timings();
+        this.download_chunks = new Map();
+        this.event_time = null;
+        this.event_round_trip = null;
+        this.visible_views = new Set();
+        this.visible = true;
+        this.data_url_is_old = false;
+        this.state_image = null;
+        this.state_owner = null;
+        this.animation = null;
+        this.rubberband = [0, 0, 0, 0];
         this._init_image();
 
         this.on('msg:custom', this.on_comm_message.bind(this));
@@ -90,10 +177,18 @@ export class MPLCanvasModel extends DOMWidgetModel {
             });
         });
         this.on('change:_size', () => {
-            this.resize_canvas();
-            this.offscreen_context.drawImage(this.image, 0, 0);
+            this.resize_canvas(true);
+        });
+        this.on('change:_render_ratio', () => {
+            // Keep showing the last frame until one at the new ratio comes
+            this.resize_canvas(true);
         });
         this.on('comm_live_update', this.update_disabled.bind(this));
+        this.on('comm_live_update', () => {
+            if (!this.comm_live) {
+                this._forget_state_image();
+            }
+        });
 
         this.update_disabled();
 
@@ -104,6 +199,14 @@ export class MPLCanvasModel extends DOMWidgetModel {
         return this.get('_size');
     }
 
+    /*
+     * DPI ratio the kernel renders the frames at, which can differ from the
+     * one of this front-end when the figure is displayed on several screens
+     */
+    get render_ratio(): number {
+        return this.get('_render_ratio') || this.ratio;
+    }
+
     get disabled(): boolean {
         return !this.comm_live;
     }
@@ -121,19 +224,94 @@ export class MPLCanvasModel extends DOMWidgetModel {
         super.sync(method, model, options);
     }
 
+    get_state(drop_defaults?: boolean) {
+        // The snapshot is only encoded when the widget state is saved
+        const owner = this.state_owner;
+        if (
+            this.data_url_is_old ||
+            (owner !== null &&
+                (owner.data_url_is_old ||
+                    !owner.comm_live ||
+                    owner.state_image !== this.state_image))
+        ) {
+            this.data_url_is_old = false;
+            this.set('_data_url', this._state_data_url(), { silent: true });
+        }
+
+        return super.get_state(drop_defaults);
+    }
+
+    /*
+     * Encode the last frame for the widget state, downscaled to
+     * state_max_pixels, or reference the identical snapshot of another figure
+     */
+    _state_data_url(): string {
+        let canvas = this.offscreen_canvas;
+        const max_pixels = this.get('state_max_pixels');
+        const pixels = canvas.width * canvas.height;
+        if (max_pixels && pixels > max_pixels) {
+            const scale = Math.sqrt(max_pixels / pixels);
+            const { width, height } = this.offscreen_canvas;
+            canvas = document.createElement('canvas');
+            canvas.width = Math.max(1, Math.floor(width * scale));
+            canvas.height = Math.max(1, Math.floor(height * scale));
+            utils
+                .getContext(canvas)
+                .drawImage(
+                    this.offscreen_canvas,
+                    0,
+                    0,
+                    canvas.width,
+                    canvas.height
+                );
+        }
+        const mime = STATE_IMAGE_MIMES[this.get('state_image_codec')];
+        const url = canvas.toDataURL(
+            mime || 'image/png',
+            this.get('state_image_quality') / 100
+        );
+
+        this._forget_state_image();
+        this.state_image = url;
+        const owner = state_images.get(url);
+        if (
+            this.get('dedup_state') &&
+            owner !== undefined &&
+            owner.comm_live &&
+            !owner.data_url_is_old
+        ) {
+            this.state_owner = owner;
+            return DATA_URL_REF + owner.model_id;
+        }
+        state_images.set(url, this);
+        return url;
+    }
+
+    _forget_state_image() {
+        if (
+            this.state_image !== null &&
+            state_images.get(this.state_image) === this
+        ) {
+            state_images.delete(this.state_image);
+        }
+        this.state_image = null;
+        this.state_owner = null;
+    }
+
     send_message(type: string, message: { [index: string]: any } = {}) {
         message['type'] = type;
+        // Lets the kernel measure how long messages wait in its queue
+        message['client_id'] = this.client_id;
+        message['timestamp'] = Date.now();
 
         this.send(message, {});
     }
 
     send_initialization_message() {
-        if (this.ratio !== 1) {
-            this.send_message('set_dpi_ratio', { dpi_ratio: this.ratio });
-            this.send_message('set_device_pixel_ratio', {
-                device_pixel_ratio: this.ratio,
-            });
-        }
+        this.send_message('set_device_pixel_ratio', {
+            device_pixel_ratio: this.ratio,
+            client_id: this.client_id,
+        });
 
         this.send_message('refresh');
         this.send_message('send_image_mode');
@@ -144,7 +322,10 @@ export class MPLCanvasModel extends DOMWidgetModel {
     send_draw_message() {
         if (!this.waiting_for_image) {
             this.waiting_for_image = true;
-            this.send_message('draw');
+            this.draw_request_time = performance.now();
+            // Report the timings of the last frames along with the request
+            this.send_message('draw', { timings: this.frame_timings });
+            this.frame_timings = empty_timings();
         }
     }
 
@@ -153,6 +334,29 @@ export class MPLCanvasModel extends DOMWidgetModel {
         let filename: string;
         let should_revoke = false;
 
+        // Large files are sent in chunks, which are kept until the last one
+        if (msg && msg.chunks !== undefined) {
+            if (msg.cancelled || !buffers || buffers.length === 0) {
+                this._end_download(msg.id);
+                return;
+            }
+            const chunks = this.download_chunks.get(msg.id) || [];
+            chunks.push(buffers[0]);
+            this.download_chunks.set(msg.id, chunks);
+
+            if (chunks.length < msg.chunks) {
+                if (chunks.length === 1) {
+                    this.message_before_download = this.get('_message');
+                }
+                const percent = Math.floor((100 * chunks.length) / msg.chunks);
+                // Only shown here, the kernel does not need to know
+                this.set('_message', `Downloading... ${percent}%`);
+                return;
+            }
+            this._end_download(msg.id);
+            buffers = chunks;
+        }
+
         // If called with buffers, use the backend-generated buffer
         if (buffers && buffers.length > 0) {
             const url_creator = window.URL || window.webkitURL;
@@ -180,13 +384,11 @@ export class MPLCanvasModel extends DOMWidgetModel {
             // Use known MIME type or generic fallback
             const mimeType = mimeTypes[format] || 'application/octet-stream';
 
-            // Convert buffer to Uint8Array
-            const buffer = new Uint8Array(
-                ArrayBuffer.isView(buffers[0]) ? buffers[0].buffer : buffers[0]
+            // Create blob with MIME type, views only cover part of their buffer
+            const blob = new Blob(
+                buffers.map((buffer) => utils.to_uint8_array(buffer)),
+                { type: mimeType }
             );
-
-            // Create blob with MIME type
-            const blob = new Blob([buffer], { type: mimeType });
             blob_url = url_creator.createObjectURL(blob);
             filename = this.get('_figure_label') + '.' + format;
             should_revoke = true;
@@ -211,9 +413,16 @@ export class MPLCanvasModel extends DOMWidgetModel {
         }
     }
 
+    _end_download(id: number) {
+        const chunks = this.download_chunks.get(id);
+        this.download_chunks.delete(id);
+        if (chunks && chunks.length > 1) {
+            this.set('_message', this.message_before_download);
+        }
+    }
+
     handle_resize(msg: { [index: string]: any }) {
-        this.resize_canvas();
-        this.offscreen_context.drawImage(this.image, 0, 0);
+        this.resize_canvas(true);
 
         if (!this.resize_requested) {
             this._for_each_view((view: MPLCanvasView) => {
@@ -255,60 +464,258 @@ export class MPLCanvasModel extends DOMWidgetModel {
     }
 
     /*
-     * Resize the offscreen canvas
+     * Resize the offscreen canvas, optionally keeping the current frame
      */
-    resize_canvas() {
-        this.offscreen_canvas.width = this.size[0] * this.ratio;
-        this.offscreen_canvas.height = this.size[1] * this.ratio;
+    resize_canvas(keep_frame = false) {
+        let frame: HTMLCanvasElement | null = null;
+        const scale = this.render_ratio / this.offscreen_ratio;
+        if (
+            keep_frame &&
+            this.offscreen_canvas.width > 0 &&
+            this.offscreen_canvas.height > 0
+        ) {
+            frame = document.createElement('canvas');
+            frame.width = this.offscreen_canvas.width;
+            frame.height = this.offscreen_canvas.height;
+            utils.getContext(frame).drawImage(this.offscreen_canvas, 0, 0);
+        }
+
+        this.offscreen_canvas.width = this.size[0] * this.render_ratio;
+        this.offscreen_canvas.height = this.size[1] * this.render_ratio;
+        this.offscreen_ratio = this.render_ratio;
+
+        if (frame !== null) {
+            this.offscreen_context.drawImage(
+                frame,
+                0,
+                0,
+                frame.width * scale,
+                frame.height * scale
+            );
+        }
     }
 
     handle_rubberband(msg: any) {
-        let x0 = msg['x0'] / this.ratio;
-        let y0 = (this.offscreen_canvas.height - msg['y0']) / this.ratio;
-        let x1 = msg['x1'] / this.ratio;
-        let y1 = (this.offscreen_canvas.height - msg['y1']) / this.ratio;
+        const ratio = this.render_ratio;
+        let x0 = msg['x0'] / ratio;
+        let y0 = (this.offscreen_canvas.height - msg['y0']) / ratio;
+        let x1 = msg['x1'] / ratio;
+        let y1 = (this.offscreen_canvas.height - msg['y1']) / ratio;
         x0 = Math.floor(x0) + 0.5;
         y0 = Math.floor(y0) + 0.5;
         x1 = Math.floor(x1) + 0.5;
         y1 = Math.floor(y1) + 0.5;
 
-        this.set('_rubberband_x', Math.min(x0, x1));
-        this.set('_rubberband_y', Math.min(y0, y1));
-        this.set('_rubberband_width', Math.abs(x1 - x0));
-        this.set('_rubberband_height', Math.abs(y1 - y0));
-        this.save_changes();
+        // Only drawn by the front-end, the kernel does not need it back
+        this.rubberband = [
+            Math.min(x0, x1),
+            Math.min(y0, y1),
+            Math.abs(x1 - x0),
+            Math.abs(y1 - y0),
+        ];
 
         this._for_each_view((view: MPLCanvasView) => {
             view.update_canvas();
         });
     }
 
+    handle_batch(msg: any, buffers: (ArrayBuffer | ArrayBufferView)[]) {
+        // The state changes and messages resulting from one event in the
+        // kernel. The state is applied as the kernel updates do, without
+        // being synced back.
+        if (Object.keys(msg['state']).length > 0) {
+            this.set_state(msg['state']);
+        }
+        for (const message of msg['messages']) {
+            this.on_comm_message(message, []);
+        }
+    }
+
     handle_draw(_msg: any) {
         // Request the server to send over a new figure.
         this.send_draw_message();
     }
 
     handle_binary(msg: any, buffers: (ArrayBuffer | ArrayBufferView)[]) {
-        const url_creator = window.URL || window.webkitURL;
-
-        const buffer = new Uint8Array(
-            ArrayBuffer.isView(buffers[0]) ? buffers[0].buffer : buffers[0]
+        // The frame is made of tiles [x, y, width, height], one buffer each:
+        // the whole canvas for full frames, the regions that changed for
+        // diff frames.
+        const tiles: number[][] = msg.tiles;
+        const received = performance.now();
+        const requested = this.draw_request_time;
+        this.draw_request_time = null;
+        const event_time = this.event_time;
+        this.event_time = null;
+
+        const decoded = Promise.all(
+            tiles.map((tile, i) =>
+                this._decode_tile(
+                    utils.to_uint8_array(buffers[i]),
+                    msg.mime,
+                    tile[2],
+                    tile[3]
+                )
+            )
         );
-        const blob = new Blob([buffer], { type: 'image/png' });
-        const image_url = url_creator.createObjectURL(blob);
 
-        // Free the memory for the previous frames
-        if (this.image.src) {
-            url_creator.revokeObjectURL(this.image.src);
-        }
+        // Tiles are decoded concurrently, but frames are drawn in order
+        this.frame_queue = this.frame_queue
+            .then(async () => {
+                const images = await decoded;
+                const start = performance.now();
+                this._record_timing('decode_ms', start - received);
 
-        this.image.src = image_url;
+                this._draw_tiles(msg.mode, tiles, images);
+
+                const end = performance.now();
+                this._record_timing('paint_ms', end - start);
+                if (requested !== null) {
+                    this._record_timing('round_trip_ms', end - requested);
+                }
+                if (event_time !== null) {
+                    this._record_event_round_trip(end - event_time);
+                }
+            })
+            .catch((error) => {
+                console.error('Could not draw frame: ', error);
+            });
 
-        this.set('_data_url', this.offscreen_canvas.toDataURL());
+        this.data_url_is_old = true;
 
         this.waiting_for_image = false;
     }
 
+    /*
+     * Frames of an animation rendered ahead by the kernel, played at the
+     * interval of the animation from requestAnimationFrame. The kernel sends
+     * more of them as they are played.
+     */
+    handle_animation(msg: any, buffers: (ArrayBuffer | ArrayBufferView)[]) {
+        let animation = this.animation;
+        if (msg.stop) {
+            if (animation !== null && animation.id === msg.id) {
+                this._stop_animation();
+            }
+            return;
+        }
+
+        if (animation === null || animation.id !== msg.id) {
+            this._stop_animation();
+            animation = this.animation = {
+                id: msg.id,
+                mime: 'image/png',
+                width: 0,
+                height: 0,
+                frames: [],
+                next: null,
+                decoding: false,
+                shown_time: null,
+                played: 0,
+                ack: 1,
+                ended: false,
+                request: null,
+            };
+        }
+
+        if (msg.end) {
+            animation.ended = true;
+        } else {
+            animation.mime = msg.mime;
+            animation.width = msg.width;
+            animation.height = msg.height;
+            animation.ack = msg.ack;
+            buffers.forEach((buffer, i) => {
+                animation.frames.push({
+                    buffer: utils.to_uint8_array(buffer),
+                    delay: msg.delays[i],
+                });
+            });
+        }
+        this._play_animation();
+    }
+
+    _play_animation() {
+        const animation = this.animation;
+        if (animation === null || animation.request !== null) {
+            return;
+        }
+
+        const step = (now: number) => {
+            animation.request = null;
+            if (this.animation !== animation) {
+                return;
+            }
+
+            const frame = animation.frames[0];
+            if (frame === undefined) {
+                // Wait for the kernel to send more frames
+                if (animation.ended) {
+                    this._stop_animation();
+                }
+                return;
+            }
+
+            if (animation.next === null && !animation.decoding) {
+                animation.decoding = true;
+                this._decode_tile(
+                    frame.buffer,
+                    animation.mime,
+                    animation.width,
+                    animation.height
+                )
+                    .then((image) => {
+                        animation.next = image;
+                        animation.decoding = false;
+                    })
+                    .catch((error) => {
+                        console.error('Could not decode frame: ', error);
+                        animation.frames.shift();
+                        animation.decoding = false;
+                    });
+            }
+
+            const due =
+                animation.shown_time === null
+                    ? now
+                    : animation.shown_time + frame.delay;
+            if (animation.next !== null && now >= due) {
+                this._draw_tiles('full', [[0, 0]], [animation.next]);
+                this.data_url_is_old = true;
+                animation.next = null;
+                animation.frames.shift();
+                // Keep to the interval, unless the frame came too late
+                animation.shown_time = now - due > frame.delay ? now : due;
+
+                animation.played += 1;
+                if (animation.played >= animation.ack) {
+                    this.send_message('animation_played', {
+                        id: animation.id,
+                        frames: animation.played,
+                    });
+                    animation.played = 0;
+                }
+            }
+
+            animation.request = requestAnimationFrame(step);
+        };
+
+        animation.request = requestAnimationFrame(step);
+    }
+
+    _stop_animation() {
+        const animation = this.animation;
+        if (animation === null) {
+            return;
+        }
+        if (animation.request !== null) {
+            cancelAnimationFrame(animation.request);
+        }
+        if (animation.next !== null && 'close' in animation.next) {
+            animation.next.close();
+        }
+        this.animation = null;
+    }
+
     handle_history_buttons(msg: any) {
         // No-op
     }
@@ -320,7 +727,8 @@ export class MPLCanvasModel extends DOMWidgetModel {
     }
 
     on_comm_message(evt: any, buffers: (ArrayBuffer | ArrayBufferView)[]) {
-        const msg = JSON.parse(evt.data);
+        // Older kernels send the message JSON-encoded in 'data'
+        const msg = typeof evt.data === 'string' ? JSON.parse(evt.data) : evt;
         const msg_type = msg['type'];
         let callback;
 
@@ -341,6 +749,137 @@ export class MPLCanvasModel extends DOMWidgetModel {
         }
     }
 
+    /*
+     * Decode one tile of a frame, the MIME type depends on the image_codec
+     */
+    async _decode_tile(
+        buffer: Uint8Array,
+        mime: string,
+        width: number,
+        height: number
+    ): Promise<Frame> {
+        if (mime === RAW_ZLIB_MIME) {
+            // Needs DecompressionStream support
+            const stream = new Blob([buffer])
+                .stream()
+                .pipeThrough(
+                    new (window as any).DecompressionStream('deflate')
+                );
+            const pixels = new ImageData(
+                new Uint8ClampedArray(await new Response(stream).arrayBuffer()),
+                width,
+                height
+            );
+            if (utils.supports_image_bitmap()) {
+                return createImageBitmap(pixels);
+            }
+
+            const canvas = document.createElement('canvas');
+            canvas.width = width;
+            canvas.height = height;
+            utils.getContext(canvas).putImageData(pixels, 0, 0);
+            return canvas;
+        }
+
+        const blob = new Blob([buffer], { type: mime });
+        if (utils.supports_image_bitmap()) {
+            // The browser decodes the image off the main thread
+            try {
+                return await createImageBitmap(blob);
+            } catch (error) {
+                // Some browsers can't decode every format this way (e.g.
+                // webp), fall back to an image element
+            }
+        }
+
+        const url_creator = window.URL || window.webkitURL;
+        const image_url = url_creator.createObjectURL(blob);
+        try {
+            return await utils.load_image(image_url);
+        } finally {
+            // Free the memory for the frame
+            url_creator.revokeObjectURL(image_url);
+        }
+    }
+
+    /*
+     * Interval between two motion or scroll events sent to the kernel, in ms.
+     * In adaptive mode, it follows the time from an event to the frame it
+     * results in, within the bounds set by the kernel.
+     */
+    get pan_zoom_wait(): number {
+        if (!this.get('adaptive_throttle')) {
+            return this.get('pan_zoom_throttle');
+        }
+        const min_wait = this.get('min_pan_zoom_throttle');
+        const max_wait = this.get('max_pan_zoom_throttle');
+        const wait =
+            this.event_round_trip === null
+                ? this.get('pan_zoom_throttle')
+                : this.event_round_trip;
+        return Math.max(min_wait, Math.min(wait, max_wait));
+    }
+
+    record_event() {
+        // Events that do not result in a frame are forgotten after a while
+        const now = performance.now();
+        if (
+            this.event_time === null ||
+            now - this.event_time > this.get('max_pan_zoom_throttle')
+        ) {
+            this.event_time = now;
+        }
+    }
+
+    _record_event_round_trip(value: number) {
+        if (value > 2 * this.get('max_pan_zoom_throttle')) {
+            // The frame was not drawn for this event
+            return;
+        }
+        this._record_timing('event_round_trip_ms', value);
+        this.event_round_trip =
+            this.event_round_trip === null
+                ? value
+                : 0.8 * this.event_round_trip + 0.2 * value;
+    }
+
+    _record_timing(name: string, value: number) {
+        const samples = this.frame_timings[name];
+        samples.push(value);
+        if (samples.length > MAX_TIMING_SAMPLES) {
+            samples.shift();
+        }
+    }
+
+    /*
+     * Draw the decoded tiles of a frame and update the views
+     */
+    _draw_tiles(mode: string, tiles: number[][], images: Frame[]) {
+        // Full images could contain transparency (where diff images
+        // almost always do), so we need to clear the canvas so that
+        // there is no ghosting.
+        if (mode === 'full') {
+            this.offscreen_context.clearRect(
+                0,
+                0,
+                this.offscreen_canvas.width,
+                this.offscreen_canvas.height
+            );
+        }
+
+        images.forEach((image, i) => {
+            this.offscreen_context.drawImage(image, tiles[i][0], tiles[i][1]);
+            if ('close' in image) {
+                // Free the memory of the decoded ImageBitmap
+                image.close();
+            }
+        });
+
+        this._for_each_view((view: MPLCanvasView) => {
+            view.update_canvas();
+        });
+    }
+
     _init_image() {
         this.image = new Image();
 
@@ -353,16 +892,23 @@ export class MPLCanvasModel extends DOMWidgetModel {
 
                 this.offscreen_context.drawImage(this.image, 0, 0);
 
+                // Downscaled snapshots are shown at the size of the figure
+                let width = this.image.width / this.ratio;
+                let height = this.image.height / this.ratio;
+                if (this.get('state_max_pixels') && this.size[0] > 0) {
+                    [width, height] = this.size;
+                }
+
                 this._for_each_view((view: MPLCanvasView) => {
                     // TODO Make this part of the CanvasView API?
                     // It feels out of place in the model
-                    view.canvas.width = this.image.width / this.ratio;
-                    view.canvas.height = this.image.height / this.ratio;
+                    view.canvas.width = width;
+                    view.canvas.height = height;
                     view.canvas.style.width = view.canvas.width + 'px';
                     view.canvas.style.height = view.canvas.height + 'px';
 
-                    view.top_canvas.width = this.image.width / this.ratio;
-                    view.top_canvas.height = this.image.height / this.ratio;
+                    view.top_canvas.width = width;
+                    view.top_canvas.height = height;
                     view.top_canvas.style.width = view.top_canvas.width + 'px';
                     view.top_canvas.style.height =
                         view.top_canvas.height + 'px';
@@ -376,28 +922,22 @@ export class MPLCanvasModel extends DOMWidgetModel {
                 return;
             }
 
-            // Full images could contain transparency (where diff images
-            // almost always do), so we need to clear the canvas so that
-            // there is no ghosting.
-            if (this.get('_image_mode') === 'full') {
-                this.offscreen_context.clearRect(
-                    0,
-                    0,
-                    this.offscreen_canvas.width,
-                    this.offscreen_canvas.height
-                );
-            }
-
-            this.offscreen_context.drawImage(this.image, 0, 0);
-
-            this._for_each_view((view: MPLCanvasView) => {
-                view.update_canvas();
-            });
+            this._draw_tiles('full', [[0, 0]], [this.image]);
         };
 
         const dataUrl = this.get('_data_url');
 
-        if (dataUrl !== null) {
+        if (dataUrl !== null && dataUrl.startsWith(DATA_URL_REF)) {
+            // The snapshot is the one of another figure
+            this.widget_manager
+                .get_model(dataUrl.slice(DATA_URL_REF.length))
+                .then((model: WidgetModel) => {
+                    this.image.src = model.get('_data_url');
+                })
+                .catch((error) => {
+                    console.error('Could not load the figure image: ', error);
+                });
+        } else if (dataUrl !== null) {
             this.image.src = dataUrl;
         }
     }
@@ -410,8 +950,29 @@ export class MPLCanvasModel extends DOMWidgetModel {
         }
     }
 
+    /*
+     * Let the kernel know when none of the views can be seen, so that it can
+     * release the buffers of the figure until it is drawn again
+     */
+    set_view_visible(view_id: string, visible: boolean) {
+        if (visible) {
+            this.visible_views.add(view_id);
+        } else {
+            this.visible_views.delete(view_id);
+        }
+
+        const any_visible = this.visible_views.size > 0;
+        if (any_visible !== this.visible) {
+            this.visible = any_visible;
+            this.send_message('visibility', {
+                client_id: this.client_id,
+                visible: any_visible,
+            });
+        }
+    }
+
     remove() {
-        this.send_message('closing');
+        this.send_message('closing', { client_id: this.client_id });
     }
 }
 
@@ -431,6 +992,7 @@ export class MPLCanvasView extends DOMWidgetView {
     private _key: string | null;
     private _resize_event: (event: MouseEvent) => void;
     private _stop_resize_event: () => void;
+    private _visibility_observer: IntersectionObserver | null = null;
 
     async render() {
         this.resizing = false;
@@ -460,6 +1022,15 @@ export class MPLCanvasView extends DOMWidgetView {
             this.toolbar_view.fade_out();
         });
 
+        if (typeof IntersectionObserver === 'function') {
+            this._visibility_observer = new IntersectionObserver((entries) => {
+                for (const entry of entries) {
+                    this.model.set_view_visible(this.cid, entry.isIntersecting);
+                }
+            });
+            this._visibility_observer.observe(this.el);
+        }
+
         this.model_events();
     }
 
@@ -576,9 +1147,9 @@ export class MPLCanvasView extends DOMWidgetView {
         );
         top_canvas.addEventListener(
             'mousemove',
-            throttle(
+            utils.throttle(
                 this.mouse_event('motion_notify'),
-                this.model.get('pan_zoom_throttle')
+                () => this.model.pan_zoom_wait
             )
         );
 
@@ -593,9 +1164,9 @@ export class MPLCanvasView extends DOMWidgetView {
 
         top_canvas.addEventListener(
             'wheel',
-            throttle(
+            utils.throttle(
                 this.mouse_event('scroll'),
-                this.model.get('pan_zoom_throttle')
+                () => this.model.pan_zoom_wait
             )
         );
         top_canvas.addEventListener('wheel', (event: any) => {
@@ -652,7 +1223,17 @@ export class MPLCanvasView extends DOMWidgetView {
                 this.canvas.height
             );
         } else {
-            this.context.drawImage(this.model.offscreen_canvas, 0, 0);
+            // The frames are rendered at the kernel DPI ratio, scale them to
+            // the one of this view
+            const offscreen_canvas = this.model.offscreen_canvas;
+            const scale = this.model.ratio / this.model.render_ratio;
+            this.context.drawImage(
+                offscreen_canvas,
+                0,
+                0,
+                offscreen_canvas.width * scale,
+                offscreen_canvas.height * scale
+            );
         }
 
         this.top_context.clearRect(
@@ -663,10 +1244,8 @@ export class MPLCanvasView extends DOMWidgetView {
         );
 
         // Draw rubberband
-        if (
-            this.model.get('_rubberband_width') !== 0 &&
-            this.model.get('_rubberband_height') !== 0
-        ) {
+        const [x, y, width, height] = this.model.rubberband;
+        if (width !== 0 && height !== 0) {
             this.top_context.strokeStyle = 'gray';
             this.top_context.lineWidth = 1;
             this.top_context.shadowColor = 'black';
@@ -674,12 +1253,7 @@ export class MPLCanvasView extends DOMWidgetView {
             this.top_context.shadowOffsetX = 1;
             this.top_context.shadowOffsetY = 1;
 
-            this.top_context.strokeRect(
-                this.model.get('_rubberband_x'),
-                this.model.get('_rubberband_y'),
-                this.model.get('_rubberband_width'),
-                this.model.get('_rubberband_height')
-            );
+            this.top_context.strokeRect(x, y, width, height);
         }
 
         // Draw resize handle
@@ -805,12 +1379,18 @@ export class MPLCanvasView extends DOMWidgetView {
                 }
             }
 
-            const x = canvas_pos.x * this.model.ratio;
-            const y = canvas_pos.y * this.model.ratio;
+            if (name === 'motion_notify' || name === 'scroll') {
+                this.model.record_event();
+            }
+
+            // In the pixels of the frames rendered by the kernel
+            const x = canvas_pos.x * this.model.render_ratio;
+            const y = canvas_pos.y * this.model.render_ratio;
 
             this.model.send_message(name, {
                 x: x,
                 y: y,
+                render_ratio: this.model.render_ratio,
                 button: event.button,
                 buttons: event.buttons,
                 step: event.step,
@@ -870,5 +1450,10 @@ export class MPLCanvasView extends DOMWidgetView {
     remove() {
         window.removeEventListener('mousemove', this._resize_event);
         window.removeEventListener('mouseup', this._stop_resize_event);
+        if (this._visibility_observer !== null) {
+            this._visibility_observer.disconnect();
+            this._visibility_observer = null;
+        }
+        this.model.set_view_visible(this.cid, false);
     }
 }
@@ -50,3 +50,61 @@ export function getModifiers(event: MouseEvent) {
     }
     return mods;
 }
+
+// Load an image, resolving once it is decoded
+export function load_image(url: string): Promise<HTMLImageElement> {
+    return new Promise((resolve, reject) => {
+        const image = new Image();
+        image.onload = () => resolve(image);
+        image.onerror = () => reject(new Error('Could not decode ' + url));
+        image.src = url;
+    });
+}
+
+// Whether images can be decoded off the main thread with createImageBitmap
+export function supports_image_bitmap(): boolean {
+    return typeof createImageBitmap === 'function';
+}
+
+// Bytes of a buffer received from the kernel, which may be a view on part of
+// a larger buffer
+export function to_uint8_array(buffer: ArrayBuffer | ArrayBufferView) {
+    if (ArrayBuffer.isView(buffer)) {
+        return new Uint8Array(
+            buffer.buffer,
+            buffer.byteOffset,
+            buffer.byteLength
+        );
+    }
+    return new Uint8Array(buffer);
+}
+
+/*
+ * Call func at most once every wait() ms, with the arguments of the last
+ * call. Unlike lodash throttle, the wait is read on every call, so it can
+ * change over time.
+ */
+export function throttle(func: (...args: any[]) => void, wait: () => number) {
+    let last_call = -Infinity;
+    let timer: ReturnType<typeof setTimeout> | null = null;
+    let pending_args: any[] = [];
+
+    const invoke = () => {
+        timer = null;
+        last_call = performance.now();
+        func(...pending_args);
+    };
+
+    return (...args: any[]) => {
+        pending_args = args;
+        if (timer !== null) {
+            return;
+        }
+        const remaining = last_call + wait() - performance.now();
+        if (remaining <= 0) {
+            invoke();
+        } else {
+            timer = setTimeout(invoke, remaining);
+        }
+    };
+}
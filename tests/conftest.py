@@ -0,0 +1,43 @@
+from unittest.mock import MagicMock
+
+import matplotlib
+import matplotlib.pyplot as plt
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def restore_rcparams():
+    """Undo the rcParams changes made by a test."""
+    with matplotlib.rc_context():
+        yield
+
+
+@pytest.fixture
+def make_canvas():
+    """
+    Return a function creating a figure and its canvas, whose messages to the
+    front-end are recorded by a mock ``send`` instead of being sent.
+
+    It takes the ``figsize`` and ``dpi`` of the figure, whether to ``plot`` a
+    line in it, and traits to set on the canvas. The figures are closed after
+    the test.
+    """
+    matplotlib.use('module://ipympl.backend_nbagg')
+    figures = []
+
+    def make_canvas(figsize=(4, 3), dpi=100, plot=True, **traits):
+        fig, ax = plt.subplots(figsize=figsize, dpi=dpi)
+        figures.append(fig)
+        if plot:
+            ax.plot([1, 2, 3], [1, 4, 2])
+
+        canvas = fig.canvas
+        canvas.send = MagicMock()
+        for name, value in traits.items():
+            setattr(canvas, name, value)
+        return canvas
+
+    yield make_canvas
+
+    for fig in figures:
+        plt.close(fig)
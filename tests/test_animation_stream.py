@@ -0,0 +1,195 @@
+"""Tests for streaming animations rendered ahead of the front-end."""
+
+import asyncio
+import io
+import threading
+from unittest.mock import patch
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.animation import FuncAnimation
+from PIL import Image
+
+
+def _make_animation(make_canvas, frames=10, **kwargs):
+    canvas = make_canvas(figsize=(2, 2), dpi=50, plot=False, headless=False)
+    ax = canvas.figure.axes[0]
+    ax.set_xlim(0, 10)
+    ax.set_ylim(0, 10)
+    (line,) = ax.plot([], [], lw=10)
+
+    def update(i):
+        line.set_data([0, 10], [i, i])
+        return (line,)
+
+    animation = FuncAnimation(
+        canvas.figure, update, frames=frames, interval=20, **kwargs
+    )
+    return canvas, animation
+
+
+def _animation_messages(canvas):
+    messages = []
+    for call_args in canvas.send.call_args_list:
+        msg = call_args[0][0]
+        if msg['type'] == 'animation':
+            messages.append((msg, call_args[1].get('buffers', [])))
+    return messages
+
+
+def _played(canvas, stream_id, frames):
+    canvas._handle_message(
+        canvas, {'type': 'animation_played', 'id': stream_id, 'frames': frames}, []
+    )
+
+
+def _line_height(buffer):
+    """Return the row of the line drawn by the animation in a frame."""
+    pixels = np.asarray(Image.open(io.BytesIO(buffer)).convert('RGB'))
+    blue = (pixels[..., 2] > 150) & (pixels[..., 0] < 100)
+    return np.nonzero(blue.any(axis=1))[0].mean()
+
+
+def test_frames_rendered_ahead(make_canvas):
+    """Up to animation_lookahead frames are sent before being played."""
+    canvas, animation = _make_animation(make_canvas, frames=20, repeat=False)
+    canvas.animation_lookahead = 8
+
+    canvas.stream_animation(animation)
+    messages = _animation_messages(canvas)
+    # Sent in batches of a quarter of the lookahead
+    assert [msg['start'] for msg, _ in messages] == [0, 2, 4, 6]
+    assert [msg['delays'] for msg, _ in messages] == [[0, 20]] + [[20, 20]] * 3
+    msg, buffers = messages[0]
+    assert msg['mime'] == 'image/png'
+    assert (msg['width'], msg['height']) == (100, 100)
+    assert msg['ack'] == 2
+    # The line goes up with every frame
+    buffers = [buffer for _, buffers in messages for buffer in buffers]
+    heights = [_line_height(buffer) for buffer in buffers]
+    assert heights == sorted(heights, reverse=True)
+    assert len(set(heights)) == 8
+
+    # Rendering resumes once a batch was played
+    _played(canvas, msg['id'], 1)
+    assert len(_animation_messages(canvas)) == 4
+    _played(canvas, msg['id'], 1)
+    assert _animation_messages(canvas)[-1][0]['start'] == 8
+
+
+def test_no_draw_while_streaming(make_canvas):
+    """The frames rendered ahead do not make the front-end draw the figure."""
+    # pyplot draws stale figures under interactive mode
+    plt.interactive(True)
+    canvas, animation = _make_animation(make_canvas, frames=20, repeat=False)
+    canvas.animation_lookahead = 8
+    canvas.draw()
+    canvas.send.reset_mock()
+
+    canvas.stream_animation(animation)
+    _played(canvas, 1, 4)
+    _played(canvas, 1, 4)
+
+    types = []
+    for call_args in canvas.send.call_args_list:
+        msg = call_args[0][0]
+        messages = msg['messages'] if msg['type'] == 'batch' else [msg]
+        types.extend(message['type'] for message in messages)
+    # Including the batches rendered once the first ones were played
+    assert len(types) > 4
+    assert set(types) == {'animation'}
+
+
+def test_animation_end(make_canvas):
+    canvas, animation = _make_animation(make_canvas, frames=5, repeat=False)
+    canvas.animation_lookahead = 4
+
+    canvas.stream_animation(animation)
+    _played(canvas, 1, 4)
+    messages = _animation_messages(canvas)
+    assert [len(buffers) for _, buffers in messages] == [1, 1, 1, 1, 1, 0]
+    assert messages[-1][0] == {'type': 'animation', 'id': 1, 'start': 5, 'end': True}
+    assert canvas.stats['animations'] == {
+        'count': 1,
+        'frames': 5,
+        'bytes': sum(len(b) for _, buffers in messages for b in buffers),
+    }
+
+
+def test_repeat_delay(make_canvas):
+    canvas, animation = _make_animation(make_canvas, frames=3, repeat_delay=100)
+    canvas.animation_lookahead = 8
+
+    canvas.stream_animation(animation)
+    delays = [
+        delay for msg, _ in _animation_messages(canvas) for delay in msg['delays']
+    ]
+    assert delays == [0, 20, 20, 120, 20, 20, 120, 20]
+
+
+def test_memory_cap(make_canvas):
+    canvas, animation = _make_animation(
+        make_canvas, frames=None, cache_frame_data=False
+    )
+    canvas.animation_max_bytes = 1
+
+    canvas.stream_animation(animation)
+    assert [len(buffers) for _, buffers in _animation_messages(canvas)] == [1]
+
+
+def test_stop_animation(make_canvas):
+    """Stopping drops the frames of the front-end and redraws the figure."""
+    canvas, animation = _make_animation(
+        make_canvas, frames=None, cache_frame_data=False
+    )
+
+    canvas.stream_animation(animation)
+    canvas.send.reset_mock()
+    canvas.stop_animation()
+
+    messages = [args[0][0] for args in canvas.send.call_args_list]
+    assert messages == [
+        {'type': 'animation', 'id': 1, 'start': 60, 'stop': True},
+        {'type': 'draw'},
+    ]
+    _played(canvas, 1, 60)
+    assert canvas.send.call_count == 2
+
+
+def test_timer_streams_animations(make_canvas):
+    """With stream_animations, starting the animation streams it."""
+    canvas, animation = _make_animation(make_canvas, frames=3, repeat=False)
+    canvas.stream_animations = True
+
+    with patch.object(canvas, 'stream_animation') as stream_animation:
+        canvas.draw()
+    stream_animation.assert_called_once_with(animation)
+
+
+def test_rendered_from_the_event_loop(make_canvas):
+    """With an event loop, frames are rendered and encoded in the background."""
+    canvas, animation = _make_animation(make_canvas, frames=6, repeat=False)
+    canvas.animation_lookahead = 4
+    canvas.threaded_encoding = True
+    threads = set()
+
+    async def stream():
+        with patch(
+            'ipympl.backend_nbagg._encode_image',
+            side_effect=lambda *args: threads.add(threading.current_thread())
+            or b'frame',
+        ):
+            canvas.stream_animation(animation)
+            # The kernel is not blocked until all the frames are rendered
+            assert canvas.stats['animations']['frames'] == 1
+            while len(_animation_messages(canvas)) < 4:
+                await asyncio.sleep(0.01)
+            _played(canvas, 1, 4)
+            while not _animation_messages(canvas)[-1][0].get('end'):
+                await asyncio.sleep(0.01)
+
+    asyncio.run(asyncio.wait_for(stream(), 10))
+
+    assert threads and threading.main_thread() not in threads
+    messages = _animation_messages(canvas)
+    assert [len(buffers) for _, buffers in messages] == [1, 1, 1, 1, 1, 1, 0]
@@ -0,0 +1,67 @@
+"""Tests for sending only the blitted regions of the canvas."""
+
+import io
+
+import numpy as np
+from PIL import Image
+
+
+def _make_canvas(make_canvas):
+    canvas = make_canvas(plot=False, headless=False)
+    ax = canvas.figure.axes[0]
+    (line,) = ax.plot([1, 2, 3], [1, 4, 2], animated=True)
+    ax.set_ylim(0, 5)
+    canvas.draw()
+    return canvas, ax, line
+
+
+def _axes_region(canvas, ax):
+    height = canvas.get_renderer().height
+    x0, y0, x1, y1 = ax.bbox.extents
+    return [
+        int(np.floor(x0)),
+        int(height - np.ceil(y1)),
+        int(np.ceil(x1) - np.floor(x0)),
+        int(np.ceil(y1) - np.floor(y0)),
+    ]
+
+
+def test_blit_sends_region(make_canvas):
+    """Blitting the axes only sends the axes region."""
+    canvas, ax, line = _make_canvas(make_canvas)
+    assert canvas.supports_blit
+
+    background = canvas.copy_from_bbox(ax.bbox)
+    for i in range(3):
+        canvas.restore_region(background)
+        line.set_ydata([1 + i, 2, 3 - i])
+        ax.draw_artist(line)
+        canvas.blit(ax.bbox)
+
+        header = canvas.send.call_args[0][0]
+        buffers = canvas.send.call_args[1]['buffers']
+        assert header['mode'] == 'diff'
+        assert [list(tile) for tile in header['tiles']] == [_axes_region(canvas, ax)]
+
+        x, y, w, h = header['tiles'][0]
+        tile = np.asarray(Image.open(io.BytesIO(buffers[0])).convert('RGBA'))
+        expected = np.asarray(canvas.get_renderer().buffer_rgba())
+        assert (tile == expected[y : y + h, x : x + w]).all()
+
+
+def test_blit_after_draw_sends_changes(make_canvas):
+    """A blit following a pending full draw does not lose the draw."""
+    canvas, ax, line = _make_canvas(make_canvas)
+
+    canvas.manager.web_sockets = []
+    ax.set_title('Changed')
+    canvas.draw()
+    canvas.manager.web_sockets = [canvas]
+
+    ax.draw_artist(line)
+    canvas.blit(ax.bbox)
+
+    header = canvas.send.call_args[0][0]
+    tiles = header['tiles']
+    # The title is outside of the axes
+    assert any(y < _axes_region(canvas, ax)[1] for _, y, _, _ in tiles)
@@ -0,0 +1,127 @@
+"""Tests for releasing the buffers of hidden and idle canvases."""
+
+import io
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from ipympl import backend_nbagg
+from ipympl.backend_nbagg import _BufferBudget
+
+
+@pytest.fixture
+def budget():
+    budget = _BufferBudget(max_bytes=0, idle_timeout=0)
+    with patch.object(backend_nbagg, 'buffer_budget', budget):
+        yield budget
+
+
+def _make_canvas(make_canvas):
+    canvas = make_canvas(headless=False)
+    canvas._handle_message(
+        canvas,
+        {'type': 'set_device_pixel_ratio', 'device_pixel_ratio': 1, 'client_id': 'a'},
+        [],
+    )
+    canvas.draw()
+    return canvas
+
+
+def _set_visible(canvas, visible):
+    canvas._handle_message(
+        canvas, {'type': 'visibility', 'client_id': 'a', 'visible': visible}, []
+    )
+
+
+def test_hidden_canvas_is_released(budget, make_canvas):
+    """The buffers of a figure scrolled out of view are released."""
+    canvas = _make_canvas(make_canvas)
+    size = canvas._buffer_bytes()
+    assert size >= 2 * 400 * 300 * 4
+    assert budget.info()['bytes'] == size
+
+    _set_visible(canvas, False)
+    assert not hasattr(canvas, 'renderer')
+    assert canvas._buffer_bytes() == 0
+    assert budget.info() == {
+        'canvases': 1,
+        'bytes': 0,
+        'max_bytes': 0,
+        'released': 1,
+        'reclaimed_bytes': size,
+    }
+    assert canvas.stats['buffers']['reclaimed_bytes'] == size
+
+
+def test_released_canvas_is_redrawn(budget, make_canvas):
+    """The next draw rebuilds the buffers and sends a full frame."""
+    canvas = _make_canvas(make_canvas)
+    expected = np.asarray(canvas.get_renderer().buffer_rgba()).copy()
+
+    _set_visible(canvas, False)
+    _set_visible(canvas, True)
+    canvas.send.reset_mock()
+    canvas.draw()
+
+    header = canvas.send.call_args[0][0]
+    assert header['mode'] == 'full'
+    image = Image.open(io.BytesIO(canvas.send.call_args[1]['buffers'][0]))
+    assert (np.asarray(image) == expected).all()
+    assert canvas._buffer_bytes() > 0
+
+
+def test_released_buffer_is_rendered_again(budget, make_canvas):
+    """Reading the Agg buffer of a released canvas renders it again."""
+    canvas = _make_canvas(make_canvas)
+    expected = np.asarray(canvas.buffer_rgba()).copy()
+
+    _set_visible(canvas, False)
+    assert (np.asarray(canvas.buffer_rgba()) == expected).all()
+    background = canvas.copy_from_bbox(canvas.figure.bbox)
+    assert (np.asarray(background) == expected).all()
+
+
+def test_visible_canvas_kept_by_default(make_canvas):
+    """Idle canvases that are still displayed keep their buffers."""
+    canvas = _make_canvas(make_canvas)
+    budget = _BufferBudget()
+
+    with patch.object(backend_nbagg, 'buffer_budget', budget):
+        budget.touch(canvas)
+        canvas._last_used -= 3600
+        budget.enforce()
+    assert canvas._buffer_bytes() > 0
+
+
+def test_closed_canvas_is_released(budget, make_canvas):
+    canvas = _make_canvas(make_canvas)
+
+    canvas._handle_message(canvas, {'type': 'closing', 'client_id': 'a'}, [])
+    assert canvas._buffer_bytes() == 0
+
+
+def test_idle_canvas_is_released(budget, make_canvas):
+    canvas = _make_canvas(make_canvas)
+    budget.idle_timeout = 60
+
+    budget.enforce()
+    assert canvas._buffer_bytes() > 0
+
+    canvas._last_used -= 120
+    budget.enforce()
+    assert canvas._buffer_bytes() == 0
+
+
+def test_least_recently_used_canvas_is_released(budget, make_canvas):
+    """Over the budget, the buffers of the least recently drawn canvas go."""
+    first = _make_canvas(make_canvas)
+    second = _make_canvas(make_canvas)
+    budget.max_bytes = first._buffer_bytes() + second._buffer_bytes()
+
+    third = _make_canvas(make_canvas)
+    assert first._buffer_bytes() == 0
+    assert second._buffer_bytes() > 0
+    assert third._buffer_bytes() > 0
+    assert budget.info()['bytes'] <= budget.max_bytes
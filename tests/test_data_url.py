@@ -0,0 +1,64 @@
+"""Tests for the lazily encoded _data_url widget state."""
+
+from base64 import b64decode
+from unittest.mock import patch
+
+PNG_PREFIX = 'data:image/png;base64,'
+
+
+def _draw_frames(canvas, n):
+    canvas.manager.web_sockets = [canvas]
+    for i in range(n):
+        canvas.figure.axes[0].set_title(f'frame {i}')
+        canvas.draw()
+
+
+def test_send_binary_does_not_encode_data_url(make_canvas):
+    """Frames sent while syncing _data_url don't encode anything."""
+    canvas = make_canvas(headless=False)
+
+    with patch.object(canvas, '_update_data_url') as mock_update:
+        _draw_frames(canvas, 5)
+        mock_update.assert_not_called()
+
+    assert canvas.send.call_count == 5
+    assert canvas._data_url_is_old
+
+
+def test_data_url_encoded_on_get_state(make_canvas):
+    """The _data_url is computed when the state is requested."""
+    canvas = make_canvas()
+    _draw_frames(canvas, 3)
+
+    data_url = canvas.get_state('_data_url')['_data_url']
+    assert data_url.startswith(PNG_PREFIX)
+    png = b64decode(data_url[len(PNG_PREFIX) :])
+    assert png[:8] == b'\x89PNG\r\n\x1a\n'
+    assert not canvas._data_url_is_old
+
+    # Nothing was drawn since, the value is reused
+    with patch('ipympl.backend_nbagg.b64encode') as mock_encode:
+        assert canvas.get_state('_data_url')['_data_url'] == data_url
+        mock_encode.assert_not_called()
+
+
+def test_data_url_reuses_full_frame(make_canvas):
+    """A full frame is not encoded a second time."""
+    canvas = make_canvas(headless=False)
+    _draw_frames(canvas, 1)
+
+    assert canvas._current_image_mode == 'full'
+    frame = canvas.send.call_args[1]['buffers'][0]
+
+    data_url = canvas.get_state('_data_url')['_data_url']
+    assert b64decode(data_url[len(PNG_PREFIX) :]) == frame
+
+
+def test_data_url_not_synced_once_initialized(make_canvas):
+    """Once the front-end is there, frames don't touch the _data_url."""
+    canvas = make_canvas()
+    canvas._handle_message(canvas, {'type': 'initialized'}, [])
+    _draw_frames(canvas, 2)
+
+    assert not canvas._data_url_is_old
+    assert canvas._last_png is None
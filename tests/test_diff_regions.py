@@ -0,0 +1,57 @@
+"""Tests for sending only the changed regions of diff frames."""
+
+import io
+
+import numpy as np
+from PIL import Image
+
+from ipympl.backend_nbagg import _changed_regions
+
+
+def test_changed_regions():
+    """Regions are merged across tiles and shrunk to the changed pixels."""
+    mask = np.zeros((300, 400), dtype=bool)
+    mask[10:20, 30:150] = True
+    mask[200:290, 300:310] = True
+
+    assert _changed_regions(mask, tile_size=64) == [
+        (30, 10, 120, 10),
+        (300, 200, 10, 90),
+    ]
+    assert _changed_regions(np.zeros((30, 40), dtype=bool)) == []
+
+
+def test_changed_regions_fallback_to_bounding_box():
+    """Too many regions are replaced by a single one."""
+    mask = np.zeros((100, 100), dtype=bool)
+    mask[::20, ::20] = True
+
+    assert _changed_regions(mask, tile_size=10, max_regions=4) == [(0, 0, 81, 81)]
+
+
+def test_diff_frame_regions(make_canvas):
+    """Drawing the regions over the previous frame gives the new frame."""
+    canvas = make_canvas(figsize=(6.4, 4.8), headless=False)
+    ax = canvas.figure.axes[0]
+    (line,) = ax.lines
+    ax.set_ylim(0, 5)
+    canvas.draw()
+
+    previous = Image.fromarray(canvas._last_buff.view(np.uint8).reshape(480, 640, 4))
+
+    line.set_ydata([1, 2, 3])
+    canvas.draw()
+
+    header = canvas.send.call_args[0][0]
+    buffers = canvas.send.call_args[1]['buffers']
+    assert header['mode'] == 'diff'
+    assert 0 < len(header['tiles']) == len(buffers)
+    assert sum(w * h for _, _, w, h in header['tiles']) < 640 * 480
+
+    for (x, y, w, h), buffer in zip(header['tiles'], buffers):
+        tile = Image.open(io.BytesIO(buffer))
+        assert tile.size == (w, h)
+        previous.alpha_composite(tile.convert('RGBA'), (x, y))
+
+    expected = canvas._last_buff.view(np.uint8).reshape(480, 640, 4)
+    assert (np.asarray(previous) == expected).all()
@@ -1,7 +1,6 @@
 """Tests for download functionality respecting rcParams."""
 
 import io
-import json
 from unittest.mock import MagicMock, patch
 
 import matplotlib
@@ -35,7 +34,7 @@ def test_send_save_buffer_respects_format(format_name, signature_check):
     call_args = canvas.send.call_args
 
     # Check message format
-    msg_data = json.loads(call_args[0][0]['data'])
+    msg_data = call_args[0][0]
     assert msg_data['type'] == 'save'
     assert msg_data['format'] == format_name
 
@@ -0,0 +1,142 @@
+"""Tests for sending downloads in chunks from the event loop."""
+
+import asyncio
+import io
+import re
+import threading
+from base64 import b64decode
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from matplotlib import rcParams
+from PIL import Image
+
+
+def _save_messages(canvas):
+    messages = []
+    for call_args in canvas.send.call_args_list:
+        msg = call_args[0][0]
+        if msg['type'] == 'save':
+            messages.append((msg, call_args[1].get('buffers', [])))
+    return messages
+
+
+def test_chunked_download(make_canvas):
+    """Files larger than the chunk size are sent in chunks."""
+    rcParams['savefig.format'] = 'svg'
+    canvas = make_canvas()
+    canvas.download_chunk_size = 1000
+
+    future = canvas.download()
+
+    messages = _save_messages(canvas)
+    assert len(messages) > 1
+    assert [msg['chunk'] for msg, _ in messages] == list(range(len(messages)))
+    assert {msg['chunks'] for msg, _ in messages} == {len(messages)}
+    assert all(msg['format'] == 'svg' for msg, _ in messages)
+
+    data = b''.join(bytes(buffers[0]) for _, buffers in messages)
+    assert data.startswith(b'<?xml') and b'<svg' in data
+    assert future.result() == len(data)
+    assert canvas.download_progress == 1
+
+
+def test_download_cache(make_canvas):
+    """The saved file is reused until the figure or the rcParams change."""
+    rcParams['savefig.format'] = 'svg'
+    canvas = make_canvas()
+    canvas.draw()
+
+    with patch.object(canvas.figure, 'savefig', wraps=canvas.figure.savefig) as savefig:
+        canvas.download()
+        canvas.download()
+        assert savefig.call_count == 1
+        assert canvas.stats['downloads']['cache_hits'] == 1
+
+        rcParams['savefig.dpi'] = 50
+        canvas.download()
+        assert savefig.call_count == 2
+
+        canvas.figure.axes[0].set_title('Changed')
+        canvas.download()
+        assert savefig.call_count == 3
+
+    buffers = [buffers[0] for _, buffers in _save_messages(canvas)]
+    assert buffers[0] == buffers[1]
+    assert buffers[3] != buffers[2]
+
+
+def test_export_after_download(make_canvas):
+    """Exporting after a download at another DPI shows the figure."""
+    rcParams['savefig.format'] = 'png'
+    rcParams['savefig.dpi'] = 50
+    canvas = make_canvas()
+    canvas.draw()
+    expected = np.asarray(canvas.buffer_rgba()).copy()
+
+    canvas.download()
+    with patch('ipympl.backend_nbagg.display') as display:
+        canvas.toolbar.export(format='png')
+
+    html = display.call_args[0][0].data
+    data = re.search(r"src='data:image/png;base64,([^']+)'", html).group(1)
+    image = np.asarray(Image.open(io.BytesIO(b64decode(data))).convert('RGBA'))
+    assert (image == expected).all()
+
+
+def test_download_saved_on_kernel_thread(make_canvas):
+    """The figure is saved on the kernel thread, only sending is deferred."""
+    rcParams['savefig.format'] = 'svg'
+    canvas = make_canvas()
+    canvas.download_chunk_size = 1000
+    threads = []
+    savefig = canvas.figure.savefig
+
+    def record_thread(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return savefig(*args, **kwargs)
+
+    async def download():
+        future = canvas.download()
+        # savefig changed the figure back, before user code runs again
+        assert canvas.figure.canvas is canvas
+        assert canvas.figure.dpi == 100
+        # The other chunks are sent from the event loop
+        assert len(_save_messages(canvas)) == 1
+        while not future.done():
+            await asyncio.sleep(0)
+        return future.result()
+
+    with patch.object(canvas.figure, 'savefig', record_thread):
+        size = asyncio.run(download())
+
+    assert threads == [threading.main_thread()]
+    messages = _save_messages(canvas)
+    assert len(messages) == messages[0][0]['chunks'] > 1
+    assert sum(len(buffers[0]) for _, buffers in messages) == size
+
+
+def test_cancel_download(make_canvas):
+    """Cancelling a download stops sending chunks and tells the front-end."""
+    rcParams['savefig.format'] = 'svg'
+    canvas = make_canvas()
+    canvas.download_chunk_size = 1000
+
+    async def download():
+        future = canvas.download()
+        while not _save_messages(canvas):
+            await asyncio.sleep(0)
+        canvas._handle_message(canvas, {'type': 'cancel_download'}, [])
+        await asyncio.sleep(0.1)
+        return future
+
+    future = asyncio.run(download())
+
+    assert future.cancelled()
+    messages = _save_messages(canvas)
+    assert messages[-1][0].get('cancelled')
+    assert 1 < len(messages) <= messages[0][0]['chunks']
+    assert canvas.stats['downloads']['sent'] == 0
+    with pytest.raises(Exception):
+        future.result()
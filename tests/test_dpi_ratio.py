@@ -0,0 +1,71 @@
+"""Tests for the per-canvas DPI ratio of the front-ends."""
+
+import pytest
+
+
+def _set_ratio(canvas, client_id, ratio):
+    canvas._handle_message(
+        canvas,
+        {
+            'type': 'set_device_pixel_ratio',
+            'device_pixel_ratio': ratio,
+            'client_id': client_id,
+        },
+        [],
+    )
+
+
+@pytest.mark.parametrize(
+    "policy,expected",
+    [("max", 2), ("min", 1), ("last", 1.5)],
+)
+def test_dpi_ratio_policy(policy, expected, make_canvas):
+    """Several front-ends are rendered for according to the policy."""
+    canvas = make_canvas(dpi_ratio_policy=policy)
+
+    _set_ratio(canvas, 'laptop', 2)
+    _set_ratio(canvas, 'monitor', 1)
+    _set_ratio(canvas, 'tablet', 1.5)
+
+    assert canvas.device_pixel_ratio == expected
+    assert canvas._render_ratio == expected
+    assert canvas.figure.dpi == 100 * expected
+
+
+def test_dpi_ratio_is_per_canvas(make_canvas):
+    """A front-end DPI ratio only applies to its canvas."""
+    hidpi = make_canvas()
+    other = make_canvas()
+
+    _set_ratio(hidpi, 'laptop', 2)
+    assert hidpi.device_pixel_ratio == 2
+    assert other.device_pixel_ratio == 1
+
+
+def test_closed_client_ratio_is_forgotten(make_canvas):
+    """The ratio goes back down once the HiDPI front-end is closed."""
+    canvas = make_canvas()
+
+    _set_ratio(canvas, 'monitor', 1)
+    _set_ratio(canvas, 'laptop', 2)
+    assert canvas.device_pixel_ratio == 2
+
+    canvas._handle_message(canvas, {'type': 'closing', 'client_id': 'laptop'}, [])
+    assert canvas.device_pixel_ratio == 1
+
+
+def test_max_pixels(make_canvas):
+    """The DPI ratio is lowered to stay within the pixel budget."""
+    canvas = make_canvas(max_pixels=400 * 300 * 2)
+
+    _set_ratio(canvas, 'laptop', 3)
+    assert canvas.device_pixel_ratio == pytest.approx(2**0.5)
+    width, height = canvas.get_width_height(physical=True)
+    assert width * height <= canvas.max_pixels
+
+    # The ratio is never lowered below 1
+    canvas.max_pixels = 100
+    assert canvas.device_pixel_ratio == 1
+
+    canvas.max_pixels = 0
+    assert canvas.device_pixel_ratio == 3
@@ -0,0 +1,124 @@
+"""Tests for merging the motion and scroll events queued in the kernel."""
+
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+
+def _make_canvas(make_canvas):
+    canvas = make_canvas(plot=False)
+    canvas.manager.handle_json = MagicMock()
+    return canvas
+
+
+def _event(type, x=10, y=10, **kwargs):
+    event = {
+        'type': type,
+        'x': x,
+        'y': y,
+        'button': 0,
+        'buttons': 0,
+        'step': 0,
+        'modifiers': [],
+    }
+    event.update(kwargs)
+    return event
+
+
+def _dispatched(canvas):
+    return [call_args[0][0] for call_args in canvas.manager.handle_json.call_args_list]
+
+
+def _receive(canvas, events):
+    """
+    Receive events all at once, as when they are queued in the kernel, and
+    return how many were dispatched before the event loop ran.
+    """
+
+    async def receive():
+        for event in events:
+            canvas._handle_message(canvas, event, [])
+        dispatched = len(_dispatched(canvas))
+        await asyncio.sleep(0)
+        return dispatched
+
+    return asyncio.run(receive())
+
+
+def test_motion_events_are_merged(make_canvas):
+    canvas = _make_canvas(make_canvas)
+
+    # Nothing is dispatched until the queued events are received
+    assert _receive(canvas, [_event('motion_notify', x=i) for i in range(5)]) == 0
+
+    assert _dispatched(canvas) == [_event('motion_notify', x=4)]
+    assert canvas.stats['events_coalesced'] == 4
+    assert canvas.stats['events']['motion_notify'] == 5
+
+
+def test_scroll_steps_are_summed(make_canvas):
+    canvas = _make_canvas(make_canvas)
+
+    _receive(canvas, [_event('scroll', x=i, step=1) for i in range(3)])
+
+    assert _dispatched(canvas) == [_event('scroll', x=2, step=3)]
+
+
+def test_other_events_keep_their_order(make_canvas):
+    """Events are only merged with the consecutive ones they supersede."""
+    canvas = _make_canvas(make_canvas)
+
+    _receive(
+        canvas,
+        [
+            _event('motion_notify', x=1),
+            _event('motion_notify', x=2),
+            _event('button_press', x=2, buttons=1),
+            _event('motion_notify', x=3, buttons=1),
+            _event('motion_notify', x=4, buttons=1),
+            _event('motion_notify', x=5, modifiers=['shift'], buttons=1),
+            _event('button_release', x=5),
+        ],
+    )
+
+    assert _dispatched(canvas) == [
+        _event('motion_notify', x=2),
+        _event('button_press', x=2, buttons=1),
+        _event('motion_notify', x=4, buttons=1),
+        _event('motion_notify', x=5, modifiers=['shift'], buttons=1),
+        _event('button_release', x=5),
+    ]
+
+
+def test_dispatched_right_away_without_event_loop(make_canvas):
+    canvas = _make_canvas(make_canvas)
+
+    canvas._handle_message(canvas, _event('motion_notify'), [])
+    assert _dispatched(canvas) == [_event('motion_notify')]
+
+
+def test_coalescing_can_be_disabled(make_canvas):
+    canvas = _make_canvas(make_canvas)
+    canvas.coalesce_events = False
+
+    events = [_event('motion_notify', x=i) for i in range(3)]
+    for event in events:
+        canvas._handle_message(canvas, event, [])
+    assert _dispatched(canvas) == events
+
+
+def test_queue_latency(make_canvas):
+    """The queueing latency is measured from the fastest message."""
+    canvas = _make_canvas(make_canvas)
+    now = time.time() * 1000
+    # The front-end clock is 5 s ahead, the second message waited 200 ms
+    for timestamp in (now + 5000, now + 4800):
+        canvas._handle_message(
+            canvas, _event('motion_notify', client_id='a', timestamp=timestamp), []
+        )
+
+    queue = canvas.stats['queue_ms']
+    assert queue['count'] == 2
+    assert queue['last'] == pytest.approx(200, abs=50)
@@ -0,0 +1,94 @@
+"""Tests for the export options of the toolbar."""
+
+import io
+import re
+from base64 import b64decode
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+
+def _make_figure(make_canvas):
+    fig = make_canvas(figsize=(8, 6)).figure
+    fig.axes[0].set_title('Export')
+    fig.canvas.draw()
+    return fig
+
+
+def _export(fig, **kwargs):
+    """Return the arguments passed to display by Toolbar.export."""
+    with patch('ipympl.backend_nbagg.display') as mock_display:
+        fig.canvas.toolbar.export(**kwargs)
+    mock_display.assert_called_once()
+    return mock_display.call_args
+
+
+def _html_image(call_args):
+    html = call_args[0][0].data
+    mime, data = re.search(r"src='data:([^;]+);base64,([^']+)'", html).groups()
+    return mime, b64decode(data)
+
+
+@pytest.mark.parametrize(
+    "export_format,mime,fmt",
+    [
+        ("png", "image/png", "PNG"),
+        ("png-palette", "image/png", "PNG"),
+        ("jpeg", "image/jpeg", "JPEG"),
+        ("webp", "image/webp", "WEBP"),
+    ],
+)
+def test_export_format(export_format, mime, fmt, make_canvas):
+    """The export_format trait selects the image format."""
+    fig = _make_figure(make_canvas)
+    fig.canvas.toolbar.export_format = export_format
+
+    with patch.object(fig, 'savefig') as mock_savefig:
+        image_mime, data = _html_image(_export(fig))
+        # The rendered frame is reused
+        mock_savefig.assert_not_called()
+
+    assert image_mime == mime
+    image = Image.open(io.BytesIO(data))
+    assert image.format == fmt
+    assert image.size == (800, 600)
+
+
+def test_export_svg(make_canvas):
+    fig = _make_figure(make_canvas)
+
+    mime, data = _html_image(_export(fig, format='svg'))
+    assert mime == 'image/svg+xml'
+    assert b'<svg' in data
+
+
+def test_export_max_width(make_canvas):
+    """Images wider than max_width are downscaled."""
+    fig = _make_figure(make_canvas)
+
+    _, data = _html_image(_export(fig, max_width=400))
+    assert Image.open(io.BytesIO(data)).size == (400, 300)
+
+
+def test_export_max_bytes(make_canvas):
+    """Images are downscaled until they fit in max_bytes."""
+    fig = _make_figure(make_canvas)
+
+    _, full = _html_image(_export(fig))
+    _, data = _html_image(_export(fig, max_bytes=len(full) // 4))
+    assert len(data) <= len(full) // 4
+    assert Image.open(io.BytesIO(data)).size[0] < 800
+
+
+def test_export_mimebundle(make_canvas):
+    """The image can be displayed as an image/* output."""
+    fig = _make_figure(make_canvas)
+    fig.canvas.toolbar.export_mimebundle = True
+
+    call_args = _export(fig, format='jpeg')
+    bundle = call_args[0][0]
+    assert call_args[1]['raw']
+    assert list(bundle) == ['image/jpeg']
+    assert Image.open(io.BytesIO(b64decode(bundle['image/jpeg']))).format == 'JPEG'
+    assert call_args[1]['metadata'] == {'image/jpeg': {'width': 800}}
@@ -0,0 +1,73 @@
+"""Tests for the kernel-side frame scheduling."""
+
+import asyncio
+
+
+def _sent_types(canvas):
+    types = []
+    for call_args in canvas.send.call_args_list:
+        msg = call_args[0][0]
+        if msg['type'] == 'batch':
+            types.extend(message['type'] for message in msg['messages'])
+        else:
+            types.append(msg['type'])
+    return types
+
+
+def test_draw_idle_is_coalesced(make_canvas):
+    """Draw requests are only sent once until the front-end asks for a frame."""
+    canvas = make_canvas(headless=False)
+
+    for _ in range(5):
+        canvas.draw_idle()
+    assert _sent_types(canvas) == ['draw']
+
+    canvas._handle_message(canvas, {'type': 'draw'}, [])
+    assert _sent_types(canvas) == ['draw', 'binary']
+
+    canvas.draw_idle()
+    assert _sent_types(canvas) == ['draw', 'binary', 'draw']
+    assert canvas.frame_stats() == {'rendered': 1, 'sent': 1, 'dropped': 4}
+
+
+def test_refresh_is_not_coalesced(make_canvas):
+    """A new front-end gets a frame even if a draw was already requested."""
+    canvas = make_canvas(headless=False)
+
+    canvas.draw_idle()
+    canvas._handle_message(canvas, {'type': 'refresh'}, [])
+    assert _sent_types(canvas).count('draw') == 2
+
+
+def test_max_fps_drops_superseded_frames(make_canvas):
+    """Frames above max_fps are dropped in favor of the latest one."""
+    canvas = make_canvas(headless=False)
+    canvas.max_fps = 10
+
+    async def draw_frames():
+        for i in range(5):
+            canvas.figure.axes[0].set_title(f'Frame {i}')
+            canvas.draw()
+        assert canvas.frame_stats() == {'rendered': 5, 'sent': 1, 'dropped': 3}
+
+        await asyncio.sleep(0.2)
+        assert canvas.frame_stats() == {'rendered': 5, 'sent': 2, 'dropped': 3}
+
+    asyncio.run(draw_frames())
+
+
+def test_max_fps_defers_requested_draw(make_canvas):
+    """A draw requested too early is rendered once max_fps allows it."""
+    canvas = make_canvas(headless=False)
+    canvas.max_fps = 10
+
+    async def request_frames():
+        canvas.draw()
+        canvas._handle_message(canvas, {'type': 'draw'}, [])
+        canvas._handle_message(canvas, {'type': 'draw'}, [])
+        assert canvas.frame_stats() == {'rendered': 1, 'sent': 1, 'dropped': 1}
+
+        await asyncio.sleep(0.2)
+        assert canvas.frame_stats() == {'rendered': 2, 'sent': 2, 'dropped': 1}
+
+    asyncio.run(request_frames())
@@ -0,0 +1,116 @@
+"""Tests for deferring rendering while no front-end is connected."""
+
+import io
+from base64 import b64decode
+from unittest.mock import patch
+
+import matplotlib.pyplot as plt
+import numpy as np
+from PIL import Image
+
+from ipympl.backend_nbagg import flush_figures
+
+PNG_PREFIX = 'data:image/png;base64,'
+
+
+def _frames(canvas):
+    return [
+        call_args
+        for call_args in canvas.send.call_args_list
+        if call_args[0][0]['type'] == 'binary'
+    ]
+
+
+def test_rendered_once_at_the_end_of_the_cell(make_canvas):
+    """Without a front-end, the figure is only rendered for its state."""
+    canvas = make_canvas()
+    ax = canvas.figure.axes[0]
+
+    for i in range(5):
+        ax.set_title(f'Frame {i}')
+        canvas.draw_idle()
+
+    assert not _frames(canvas)
+    assert canvas.stats['frames']['rendered'] == 0
+    assert canvas.stats['frames_deferred'] == 5
+
+    with patch('ipympl.backend_nbagg.display'):
+        flush_figures()
+        flush_figures()
+    assert canvas.stats['frames']['rendered'] == 1
+
+    png = b64decode(canvas._data_url[len(PNG_PREFIX) :])
+    assert Image.open(io.BytesIO(png)).size == (400, 300)
+
+
+def test_draw_renders_without_front_end(make_canvas):
+    """An explicit draw updates the Agg buffer, only sending it is deferred."""
+    canvas = make_canvas()
+
+    canvas.draw()
+    pixels = np.asarray(canvas.buffer_rgba())
+    assert len(np.unique(pixels.reshape(-1, 4), axis=0)) > 100
+    # Blitting needs the rendered background
+    background = np.asarray(canvas.copy_from_bbox(canvas.figure.axes[0].bbox))
+    assert len(np.unique(background.reshape(-1, 4), axis=0)) > 1
+    assert not _frames(canvas)
+
+    # The rendered frame is sent once the front-end is there
+    assert canvas.stats['frames']['rendered'] == 1
+    canvas._handle_message(canvas, {'type': 'initialized'}, [])
+    (batch,) = [args[0][0] for args in canvas.send.call_args_list]
+    assert {'type': 'draw'} in batch['messages']
+
+
+def test_rendered_once_when_displayed(make_canvas):
+    canvas = make_canvas()
+    canvas.draw()
+
+    with patch.object(canvas.figure, 'savefig') as mock_savefig:
+        canvas._repr_mimebundle_()
+        canvas.get_state('_data_url')
+        mock_savefig.assert_not_called()
+    assert canvas.stats['frames']['rendered'] == 1
+
+
+def test_rendered_once_when_interactive(make_canvas):
+    """Drawing does not defer the figure again through pyplot's auto-draw."""
+    with plt.ion():
+        canvas = make_canvas()
+        canvas.draw()
+        assert not canvas._render_deferred
+
+        for _ in range(3):
+            canvas.get_state()
+        with patch('ipympl.backend_nbagg.display'):
+            canvas._repr_mimebundle_()
+    assert canvas.stats['frames']['rendered'] == 1
+
+
+def test_frames_sent_once_initialized(make_canvas):
+    """Changes deferred until the front-end is there are then drawn."""
+    canvas = make_canvas()
+    canvas.draw_idle()
+    assert not canvas.send.called
+
+    canvas._handle_message(canvas, {'type': 'initialized'}, [])
+    # Sent along with the resize message
+    (batch,) = [args[0][0] for args in canvas.send.call_args_list]
+    assert batch['type'] == 'batch'
+    assert {'type': 'draw'} in batch['messages']
+
+    canvas.draw()
+    assert len(_frames(canvas)) == 1
+
+
+def test_headless_set_explicitly(make_canvas):
+    canvas = make_canvas()
+    canvas.headless = True
+    canvas._handle_message(canvas, {'type': 'initialized'}, [])
+
+    canvas.draw()
+    assert not _frames(canvas)
+
+    canvas.headless = False
+    canvas.draw()
+    assert len(_frames(canvas)) == 1
@@ -0,0 +1,82 @@
+"""Tests for the image codecs of the frames sent to the front-end."""
+
+import io
+import zlib
+
+import numpy as np
+import pytest
+from PIL import Image
+
+
+def _send_frame(canvas):
+    canvas.draw()
+    call_args = canvas.send.call_args
+    return call_args[0][0], call_args[1]['buffers']
+
+
+@pytest.mark.parametrize(
+    "codec,mime,fmt",
+    [
+        ("png", "image/png", "PNG"),
+        ("png-palette", "image/png", "PNG"),
+        ("jpeg", "image/jpeg", "JPEG"),
+        ("webp", "image/webp", "WEBP"),
+    ],
+)
+def test_frame_codec(codec, mime, fmt, make_canvas):
+    """Frames are encoded with the canvas image_codec."""
+    canvas = make_canvas(headless=False, image_codec=codec)
+
+    header, buffers = _send_frame(canvas)
+    assert header['type'] == 'binary'
+    assert header['mime'] == mime
+
+    image = Image.open(io.BytesIO(buffers[0]))
+    assert image.format == fmt
+    assert [list(tile) for tile in header['tiles']] == [[0, 0, *image.size]]
+    if codec == 'png-palette':
+        assert image.mode == 'P'
+
+
+def test_raw_zlib_frame(make_canvas):
+    """raw-zlib frames are the compressed RGBA buffer."""
+    canvas = make_canvas(headless=False, image_codec='raw-zlib', image_compression=1)
+
+    header, buffers = _send_frame(canvas)
+    assert header['mime'] == 'application/x-ipympl-rgba-zlib'
+
+    pixels = np.frombuffer(zlib.decompress(buffers[0]), dtype=np.uint32)
+    expected = canvas._last_buff
+    _, _, width, height = header['tiles'][0]
+    assert (pixels.reshape((height, width)) == expected).all()
+
+
+def test_jpeg_never_sends_diff_frames(make_canvas):
+    """jpeg has no transparency, so every frame is a full frame."""
+    canvas = make_canvas(headless=False, image_codec='jpeg')
+
+    _send_frame(canvas)
+    canvas.figure.axes[0].set_title('Changed')
+    _send_frame(canvas)
+    assert canvas._current_image_mode == 'full'
+
+    canvas.image_codec = 'png'
+    canvas.figure.axes[0].set_title('Changed again')
+    _send_frame(canvas)
+    # Switching codecs forces a full frame
+    assert canvas._current_image_mode == 'full'
+    canvas.figure.axes[0].set_title('Changed once more')
+    _send_frame(canvas)
+    assert canvas._current_image_mode == 'diff'
+
+
+def test_png_compression_level(make_canvas):
+    """A lower compression level produces bigger png frames."""
+    canvas = make_canvas(headless=False, image_compression=0)
+    _, uncompressed = _send_frame(canvas)
+
+    canvas.image_compression = 9
+    canvas._force_full = True
+    _, compressed = _send_frame(canvas)
+
+    assert len(compressed[0]) < len(uncompressed[0])
@@ -0,0 +1,71 @@
+"""Tests for the time it takes to import the backend."""
+
+import subprocess
+import sys
+
+# Modules the backend only imports where they are used
+LAZY_MODULES = [
+    'PIL',
+    'PIL.Image',
+    'PIL.features',
+    'hashlib',
+    'concurrent.futures.thread',
+]
+
+# Dependencies of the backend, imported before measuring it
+DEPENDENCIES = [
+    'numpy',
+    'matplotlib.backend_bases',
+    'IPython.display',
+    'ipywidgets',
+    'traitlets',
+]
+
+# Import time of the backend itself, in microseconds. It is about 15 ms, the
+# margin accounts for slow machines and missing bytecode caches.
+IMPORT_TIME_BUDGET = 150_000
+
+
+def _import_times(dependencies=DEPENDENCIES):
+    """
+    Return the time spent importing ``ipympl.backend_nbagg`` once
+    ``dependencies`` are imported, and the modules it imported itself.
+    """
+    modules = [*dependencies, 'ipympl.backend_nbagg']
+    code = '; '.join(f'import {name}' for name in modules)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Lines are "import time: self [us] | cumulative | <indent>module", the
+    # modules imported by a module are listed before it, indented by 2 more
+    imported = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '[us]' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if name.strip() == 'ipympl.backend_nbagg':
+            return int(cumulative), imported
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 0:
+            imported = []
+        elif depth == 1:
+            imported.append(name.strip())
+    raise AssertionError('ipympl.backend_nbagg was not imported')
+
+
+def test_lazy_imports():
+    _, imported = _import_times(dependencies=[])
+
+    for name in LAZY_MODULES:
+        assert name not in imported
+
+
+def test_import_time_budget():
+    # The fastest of a few runs, to leave out the noise of the machine
+    import_time = min(_import_times()[0] for _ in range(3))
+
+    assert import_time < IMPORT_TIME_BUDGET
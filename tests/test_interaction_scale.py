@@ -0,0 +1,116 @@
+"""Tests for rendering at a lower resolution during interactions."""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+
+def _make_canvas(make_canvas, **traits):
+    canvas = make_canvas(plot=False, coalesce_events=False, **traits)
+    canvas.figure.axes[0].plot([0, 10], [0, 10])
+    canvas._handle_message(
+        canvas,
+        {'type': 'set_device_pixel_ratio', 'device_pixel_ratio': 2, 'client_id': 'a'},
+        [],
+    )
+    return canvas
+
+
+def _mouse(canvas, type, x, y, buttons=0):
+    """Send a mouse event at (x, y) CSS pixels, as the front-end does."""
+    ratio = canvas._render_ratio
+    canvas._handle_message(
+        canvas,
+        {
+            'type': type,
+            'x': x * ratio,
+            'y': y * ratio,
+            'button': 0,
+            'buttons': buttons,
+            'modifiers': [],
+            'render_ratio': ratio,
+        },
+        [],
+    )
+
+
+def test_lower_resolution_while_button_held(make_canvas):
+    canvas = _make_canvas(make_canvas, interaction_scale=0.5)
+
+    _mouse(canvas, 'button_press', 100, 100, buttons=1)
+    assert canvas.device_pixel_ratio == 1
+    assert canvas._render_ratio == 1
+    assert canvas.figure.dpi == 100
+
+    _mouse(canvas, 'button_release', 100, 100)
+    assert canvas.device_pixel_ratio == 2
+    assert canvas._force_full
+    assert canvas.stats['interactions']['count'] == 1
+
+
+def test_disabled_by_default(make_canvas):
+    canvas = _make_canvas(make_canvas)
+
+    _mouse(canvas, 'button_press', 100, 100, buttons=1)
+    assert canvas.device_pixel_ratio == 2
+
+
+def test_release_out_of_the_figure(make_canvas):
+    """Moving without a button held ends the interaction."""
+    canvas = _make_canvas(make_canvas, interaction_scale=0.5)
+
+    _mouse(canvas, 'button_press', 100, 100, buttons=1)
+    _mouse(canvas, 'motion_notify', 120, 100, buttons=1)
+    assert canvas.device_pixel_ratio == 1
+    _mouse(canvas, 'motion_notify', 150, 100)
+    assert canvas.device_pixel_ratio == 2
+
+
+def test_mouse_position_follows_the_ratio(make_canvas):
+    """Events sent at the previous ratio are converted to the current one."""
+    canvas = _make_canvas(make_canvas, interaction_scale=0.5)
+    canvas.manager.handle_json = MagicMock()
+
+    # Sent before the front-end knew of the lower ratio
+    _mouse(canvas, 'button_press', 100, 50, buttons=1)
+    event = canvas.manager.handle_json.call_args[0][0]
+    assert (event['x'], event['y']) == (100, 50)
+
+
+@pytest.mark.parametrize("coalesce_events", [False, True])
+def test_pan_is_not_affected(coalesce_events, make_canvas):
+    """Panning at a lower resolution ends up at the same limits."""
+    limits = []
+    for scale in (1, 0.5):
+        canvas = _make_canvas(make_canvas, interaction_scale=scale)
+        canvas.coalesce_events = coalesce_events
+        canvas.toolbar.pan()
+
+        _mouse(canvas, 'button_press', 200, 150, buttons=1)
+        for x in range(210, 300, 10):
+            _mouse(canvas, 'motion_notify', x, 150, buttons=1)
+        _mouse(canvas, 'button_release', 290, 150)
+
+        ax = canvas.figure.axes[0]
+        limits.append([*ax.get_xlim(), *ax.get_ylim()])
+
+    assert limits[0] == pytest.approx(limits[1])
+
+
+def test_lower_resolution_while_resizing(make_canvas):
+    canvas = _make_canvas(make_canvas, interaction_scale=0.5)
+
+    async def resize():
+        for width in (400, 420, 440):
+            canvas._handle_message(
+                canvas, {'type': 'resize', 'width': width, 'height': 300}, []
+            )
+            await asyncio.sleep(0.01)
+        resizing = canvas.device_pixel_ratio
+        await asyncio.sleep(0.5)
+        return resizing
+
+    assert asyncio.run(resize()) == 1
+    assert canvas.device_pixel_ratio == 2
+    assert canvas.figure.bbox.size[0] == pytest.approx(440 * 2)
@@ -0,0 +1,61 @@
+"""Tests for the locks of the Gcf registry and of the figure managers."""
+
+import threading
+import time
+from unittest.mock import patch
+
+from ipympl.backend_nbagg import _InstrumentedLock
+
+
+def test_instrumented_lock_stats():
+    """Waiting for and holding the lock is measured, once per thread."""
+    lock = _InstrumentedLock()
+    acquired = threading.Event()
+
+    def hold():
+        with lock:
+            with lock:
+                acquired.set()
+                time.sleep(0.1)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    acquired.wait()
+    with lock:
+        pass
+    thread.join()
+
+    stats = lock.stats()
+    assert stats['acquisitions'] == 2
+    assert stats['contended'] == 1
+    assert stats['max_wait_ms'] > 50
+    assert stats['max_hold_ms'] > 50
+    assert stats['hold_ms'] >= stats['max_hold_ms']
+
+
+def test_figures_displayed_concurrently(make_canvas):
+    """Showing figures from several threads does not serialize on one lock."""
+    figures = [make_canvas(plot=False).figure for _ in range(4)]
+
+    # Only passes once every thread is displaying its figure at the same time
+    barrier = threading.Barrier(len(figures), timeout=5)
+    errors = []
+
+    def display(*args, **kwargs):
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError as e:
+            errors.append(e)
+
+    with patch('ipympl.backend_nbagg.display', display):
+        threads = [threading.Thread(target=fig.canvas.manager.show) for fig in figures]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert not errors
+    for fig in figures:
+        lock_stats = fig.canvas.stats['lock']
+        assert lock_stats['acquisitions'] == 1
+        assert lock_stats['contended'] == 0
@@ -0,0 +1,47 @@
+"""Tests for the thread-safe mathtext parsing workaround."""
+
+import threading
+
+from matplotlib.mathtext import MathTextParser
+
+import ipympl.backend_nbagg  # noqa: F401
+
+
+def test_parser_per_thread():
+    """Each thread parses with its own parser, without errors."""
+    parsers = {}
+    errors = []
+    barrier = threading.Barrier(8, timeout=5)
+
+    def parse(i):
+        parser = MathTextParser('agg')
+        try:
+            barrier.wait()
+            for j in range(20):
+                # Distinct expressions, so that they are not cached
+                parser.parse(f'$10^{{{i * 100 + j}}} \\alpha_{{{j}}}$', dpi=72)
+            parsers[i] = parser._parser
+            assert parser._parser is MathTextParser._parser
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=parse, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len({id(parser) for parser in parsers.values()}) == 8
+
+
+def test_parse_cache_size():
+    """More parse results are cached than matplotlib does by default."""
+    cache_info = MathTextParser._parse_cached.cache_info()
+    assert cache_info.maxsize == ipympl.backend_nbagg._mathtext_cache_size
+
+    parser = MathTextParser('agg')
+    parser.parse('$10^{3}$', dpi=100)
+    hits = MathTextParser._parse_cached.cache_info().hits
+    parser.parse('$10^{3}$', dpi=100)
+    assert MathTextParser._parse_cached.cache_info().hits == hits + 1
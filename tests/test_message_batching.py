@@ -0,0 +1,120 @@
+"""Tests for sending the messages resulting from an event as one."""
+
+from contextlib import nullcontext
+from unittest.mock import MagicMock, patch
+
+import matplotlib
+
+from ipympl.backend_nbagg import Canvas
+
+
+def _make_canvas(make_canvas):
+    canvas = make_canvas(headless=False, coalesce_events=False)
+    # Every comm message, custom messages and state updates alike
+    del canvas.send
+    canvas._send = MagicMock()
+    canvas.draw()
+    canvas._send.reset_mock()
+    return canvas
+
+
+def _event(type, x, y, **kwargs):
+    event = {
+        'type': type,
+        'x': x,
+        'y': y,
+        'button': 0,
+        'buttons': 1,
+        'modifiers': [],
+    }
+    event.update(kwargs)
+    return event
+
+
+def _zoom_drag(canvas, steps):
+    """Drag a zoom rectangle, return the comm messages sent per event."""
+    canvas.toolbar.zoom()
+    events = [_event('button_press', 100, 100)]
+    events += [_event('motion_notify', 100 + 10 * i, 100 + 5 * i) for i in steps]
+    counts = []
+    for event in events:
+        canvas._send.reset_mock()
+        canvas._handle_message(canvas, event, [])
+        counts.append(canvas._send.call_count)
+    return counts
+
+
+def _custom_messages(canvas):
+    return [
+        call_args[0][0]['content']
+        for call_args in canvas._send.call_args_list
+        if call_args[0][0]['method'] == 'custom'
+    ]
+
+
+def test_zoom_drag_step_sends_one_message(make_canvas):
+    canvas = _make_canvas(make_canvas)
+
+    counts = _zoom_drag(canvas, range(1, 6))
+    assert counts[1:] == [1] * 5
+
+    # The rubberband along with the coordinates shown in the toolbar
+    (batch,) = _custom_messages(canvas)
+    assert batch['type'] == 'batch'
+    assert [msg['type'] for msg in batch['messages']] == ['rubberband']
+    assert batch['messages'][0]['x1'] == 150
+    assert list(batch['state']) == ['_message']
+
+    assert canvas.stats['messages']['merged'] >= 5
+
+
+def test_fewer_messages_than_unbatched(make_canvas):
+    """Count the comm messages of a zoom drag with and without batching."""
+    canvas = _make_canvas(make_canvas)
+    unbatched_canvas = _make_canvas(make_canvas)
+
+    batched = sum(_zoom_drag(canvas, range(1, 11)))
+    with patch.object(Canvas, '_batch_messages', lambda self: nullcontext()):
+        unbatched = sum(_zoom_drag(unbatched_canvas, range(1, 11)))
+
+    assert batched <= 11
+    assert unbatched >= 2 * 10
+    assert canvas.stats['messages']['sent'] < unbatched_canvas.stats['messages']['sent']
+
+
+def test_messages_sent_as_is(make_canvas):
+    """Messages are no longer JSON-encoded, a lone message is not batched."""
+    canvas = _make_canvas(make_canvas)
+
+    canvas.send_event('navigate_mode', mode='ZOOM')
+    assert _custom_messages(canvas) == [{'type': 'navigate_mode', 'mode': 'ZOOM'}]
+
+    canvas._send.reset_mock()
+    canvas._handle_message(canvas, {'type': 'refresh'}, [])
+    (batch,) = _custom_messages(canvas)
+    assert {'type': 'draw'} in batch['messages']
+
+
+def test_order_kept_around_frames(make_canvas):
+    """Messages batched before a frame are sent before it."""
+    canvas = _make_canvas(make_canvas)
+    canvas.figure.axes[0].set_title('Changed')
+
+    def handle_draw(event):
+        canvas.send_event('history_buttons', Back=False, Forward=False)
+        canvas.set_cursor(matplotlib.backend_bases.cursors.MOVE)
+        canvas.draw()
+        canvas.send_event('navigate_mode', mode='')
+
+    canvas._send.reset_mock()
+    with patch.object(canvas.manager, 'handle_json', handle_draw):
+        canvas._handle_message(canvas, {'type': 'draw'}, [])
+
+    sent = [call_args[0][0] for call_args in canvas._send.call_args_list]
+    assert [msg['content']['type'] for msg in sent] == [
+        'history_buttons',
+        'binary',
+        'batch',
+    ]
+    assert sent[2]['content']['messages'] == [{'type': 'navigate_mode', 'mode': ''}]
+    assert sent[2]['content']['state']['_cursor'] == 'move'
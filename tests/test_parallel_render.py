@@ -0,0 +1,112 @@
+"""Tests for encoding the snapshots of the figures of a cell on several threads."""
+
+import threading
+from unittest.mock import patch
+
+import matplotlib.pyplot as plt
+import pytest
+from matplotlib.animation import FuncAnimation
+
+from ipympl import backend_nbagg
+from ipympl.backend_nbagg import Canvas, _Backend_ipympl, flush_figures
+
+
+def _make_canvases(make_canvas, count, same=False):
+    canvases = []
+    for i in range(count):
+        canvas = make_canvas(figsize=(3, 2), dpi=50, plot=False)
+        canvas.figure.axes[0].plot([1, 2, 3], [1, 4, 2 if same else i])
+        # Rendering is deferred until the end of the cell
+        canvas.draw_idle()
+        canvases.append(canvas)
+
+    _Backend_ipympl._to_show = [canvas.figure for canvas in canvases]
+    _Backend_ipympl._draw_called = True
+    return canvases
+
+
+def _flush(workers):
+    with patch.object(backend_nbagg, 'render_workers', workers):
+        with patch('ipympl.backend_nbagg.display') as display:
+            flush_figures()
+    return [call_args[0][0] for call_args in display.call_args_list]
+
+
+@pytest.mark.parametrize("interactive", [False, True])
+@pytest.mark.parametrize("workers", [0, 4])
+def test_figures_rendered(workers, interactive, make_canvas):
+    # pyplot draws stale figures under interactive mode
+    plt.interactive(interactive)
+    canvases = _make_canvases(make_canvas, 6)
+    threads = set()
+    for canvas in canvases:
+        canvas.mpl_connect(
+            'draw_event', lambda event: threads.add(threading.current_thread().name)
+        )
+    encode_threads = set()
+    encode_state_image = Canvas._encode_state_image
+
+    def record_thread(self, *args):
+        encode_threads.add(threading.current_thread().name)
+        return encode_state_image(self, *args)
+
+    with patch.object(Canvas, '_encode_state_image', record_thread):
+        displayed = _flush(workers)
+
+    assert displayed == canvases
+    # Only the encoding runs on other threads
+    assert threads == {threading.current_thread().name}
+    if workers:
+        assert all(name.startswith('ipympl-render') for name in encode_threads)
+    else:
+        assert encode_threads == {threading.current_thread().name}
+    for canvas in canvases:
+        assert canvas.stats['frames']['rendered'] == 1
+        assert canvas._data_url.startswith('data:image/png;base64,')
+        if workers:
+            # The snapshot displayed is encoded ahead
+            assert canvas._snapshot is not None
+
+    # Nor are they rendered again for their state or to be displayed
+    for canvas in canvases:
+        canvas.get_state()
+        canvas._repr_mimebundle_()
+        assert canvas.stats['frames']['rendered'] == 1
+    assert threads == {threading.current_thread().name}
+
+
+def test_same_as_serial(make_canvas):
+    data_urls = []
+    for workers in (0, 4):
+        canvases = _make_canvases(make_canvas, 4)
+        _flush(workers)
+        data_urls.append([canvas._data_url for canvas in canvases])
+
+    assert data_urls[0] == data_urls[1]
+
+
+def test_deduplicated(make_canvas):
+    canvases = _make_canvases(make_canvas, 4, same=True)
+    for canvas in canvases:
+        canvas.dedup_state = True
+
+    _flush(4)
+    refs = [canvas._data_url.startswith('ipympl-ref:') for canvas in canvases]
+    assert refs.count(False) == 1
+
+
+def test_animation_started_on_kernel_thread(make_canvas):
+    """The timer of an animation starts on the kernel thread."""
+    (canvas,) = _make_canvases(make_canvas, 1)
+    (line,) = canvas.figure.axes[0].lines
+    animation = FuncAnimation(
+        canvas.figure, lambda i: line.set_ydata([1, 2, i]), frames=3
+    )
+    threads = []
+    animation.event_source._timer_start = lambda: threads.append(
+        threading.current_thread()
+    )
+
+    _flush(4)
+
+    assert threads == [threading.main_thread()]
@@ -0,0 +1,78 @@
+"""Tests for reusing the last rendered frame in display and export."""
+
+import io
+from unittest.mock import patch
+
+import matplotlib
+import numpy as np
+from PIL import Image
+
+
+def _as_array(png):
+    return np.asarray(Image.open(io.BytesIO(png)))
+
+
+def test_snapshot_reuses_rendered_frame(make_canvas):
+    """The figure is not rendered again while it is up to date."""
+    canvas = make_canvas()
+    canvas.draw()
+
+    with patch.object(canvas.figure, 'savefig') as mock_savefig:
+        png = canvas._get_snapshot_png()
+        assert canvas._get_snapshot_png() is png
+        mock_savefig.assert_not_called()
+
+    assert canvas.snapshot_cache_info() == {'hits': 2, 'misses': 0}
+
+    buf = io.BytesIO()
+    canvas.figure.savefig(buf, format='png', dpi='figure')
+    assert (_as_array(png) == _as_array(buf.getvalue())).all()
+
+
+def test_snapshot_invalidated_by_changes(make_canvas):
+    """A stale figure, or savefig settings that differ, render again."""
+    canvas = make_canvas(headless=False)
+    canvas.draw()
+
+    canvas.figure.axes[0].set_title('Changed')
+    canvas._get_snapshot_png()
+    assert canvas.snapshot_cache_info() == {'hits': 0, 'misses': 1}
+
+    canvas.draw()
+    with matplotlib.rc_context({'savefig.bbox': 'tight'}):
+        canvas._get_snapshot_png()
+    assert canvas.snapshot_cache_info() == {'hits': 0, 'misses': 2}
+
+
+def test_snapshot_at_figure_dpi_on_hidpi(make_canvas):
+    """On HiDPI screens, the snapshot is not the buffer rendered at their DPI."""
+    canvas = make_canvas()
+    canvas._handle_message(
+        canvas,
+        {'type': 'set_device_pixel_ratio', 'device_pixel_ratio': 2, 'client_id': 'a'},
+        [],
+    )
+    canvas.draw()
+    assert canvas.get_renderer().width == 800
+
+    for _ in range(2):
+        png = canvas._get_snapshot_png()
+        assert Image.open(io.BytesIO(png)).size == (400, 300)
+    assert canvas._get_snapshot_rgba().shape == (300, 400, 4)
+    assert canvas.snapshot_cache_info()['hits'] == 0
+
+
+def test_repr_mimebundle_and_export_use_snapshot(make_canvas):
+    """Displaying then exporting a drawn figure does not render it."""
+    canvas = make_canvas()
+    canvas.draw()
+
+    with patch.object(canvas.figure, 'savefig') as mock_savefig, patch(
+        'ipympl.backend_nbagg.display'
+    ):
+        data = canvas._repr_mimebundle_()
+        canvas.toolbar.export()
+        mock_savefig.assert_not_called()
+
+    assert data['image/png']
+    assert canvas.snapshot_cache_info()['hits'] == 2
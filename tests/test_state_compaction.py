@@ -0,0 +1,97 @@
+"""Tests for compacting the snapshots saved in the widget state."""
+
+import io
+from base64 import b64decode
+from unittest.mock import patch
+
+from PIL import Image
+
+from ipympl.backend_nbagg import flush_figures
+
+
+def _state_image(canvas):
+    canvas.get_state('_data_url')
+    header, data = canvas._data_url.split(',', 1)
+    return header, Image.open(io.BytesIO(b64decode(data)))
+
+
+def test_state_max_pixels(make_canvas):
+    canvas = make_canvas(state_max_pixels=30000)
+    canvas.draw()
+
+    header, image = _state_image(canvas)
+    assert header == 'data:image/png;base64'
+    assert image.size == (200, 150)
+
+
+def test_state_image_codec(make_canvas):
+    canvas = make_canvas(state_image_codec='jpeg', state_image_quality=50)
+    canvas.draw()
+
+    header, image = _state_image(canvas)
+    assert header == 'data:image/jpeg;base64'
+    assert image.format == 'JPEG'
+    assert image.size == (400, 300)
+    assert canvas.stats['state']['image_bytes'] < 400 * 300
+
+
+def test_identical_snapshots_deduplicated(make_canvas):
+    """A figure identical to another one references its snapshot."""
+    first = make_canvas(dedup_state=True)
+    first.draw()
+    second = make_canvas(dedup_state=True)
+    second.draw()
+    first.get_state('_data_url')
+    second.get_state('_data_url')
+
+    assert first._data_url.startswith('data:image/png;base64,')
+    assert second._data_url == 'ipympl-ref:' + first.model_id
+    assert second.stats['state'] == {
+        'bytes': len(second._data_url),
+        'image_bytes': first.stats['state']['image_bytes'],
+        'deduplicated': True,
+    }
+
+    # Once the first figure changes, the second one has its own snapshot
+    first.figure.axes[0].set_title('Changed')
+    first.draw()
+    first.get_state('_data_url')
+    assert second._data_url.startswith('data:image/png;base64,')
+    assert not second.stats['state']['deduplicated']
+
+
+def test_closed_figure_not_referenced(make_canvas):
+    first = make_canvas(dedup_state=True)
+    first.draw()
+    second = make_canvas(dedup_state=True)
+    second.draw()
+    with patch('ipympl.backend_nbagg.display'):
+        flush_figures()
+    assert second._data_url.startswith('ipympl-ref:')
+
+    first.close()
+    assert second._data_url.startswith('data:image/png;base64,')
+
+
+def test_dedup_disabled_by_default(make_canvas):
+    """Other front-ends cannot display references, they are opt-in."""
+    first = make_canvas()
+    first.draw()
+    second = make_canvas()
+    second.draw()
+    first.get_state('_data_url')
+    second.get_state('_data_url')
+
+    assert second._data_url == first._data_url
+
+
+def test_mimebundle_codec(make_canvas):
+    canvas = make_canvas(state_image_codec='webp', state_max_pixels=30000)
+    canvas.draw()
+
+    bundle = canvas._repr_mimebundle_()
+    assert 'image/png' not in bundle
+    image = Image.open(io.BytesIO(b64decode(bundle['image/webp'])))
+    assert image.format == 'WEBP'
+    assert image.size == (200, 150)
+    assert "src='data:image/webp;base64," in bundle['text/html']
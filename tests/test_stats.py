@@ -0,0 +1,46 @@
+"""Tests for the canvas performance statistics."""
+
+from ipympl.backend_nbagg import connection_info
+
+
+def test_kernel_stats(make_canvas):
+    """Drawing frames records their timings and sizes."""
+    canvas = make_canvas(headless=False)
+
+    for i in range(3):
+        canvas.figure.axes[0].set_title(f'Frame {i}')
+        canvas.draw()
+
+    stats = canvas.stats
+    assert stats['frames'] == {'rendered': 3, 'sent': 3, 'dropped': 0}
+    for name in ('draw_ms', 'encode_ms', 'send_ms', 'frame_bytes'):
+        assert stats[name]['count'] == 3
+        assert stats[name]['max'] >= stats[name]['mean'] > 0
+
+    frame_sizes = [sum(map(len, c[1]['buffers'])) for c in canvas.send.call_args_list]
+    assert stats['bytes_sent'] == sum(frame_sizes)
+    assert stats['frame_bytes']['last'] == frame_sizes[-1]
+    assert stats['decode_ms']['count'] == 0
+
+
+def test_frontend_stats(make_canvas):
+    """Messages are counted and the front-end timings recorded."""
+    canvas = make_canvas(headless=False)
+
+    timings = {
+        'decode_ms': [1.0, 3.0],
+        'paint_ms': [0.5],
+        'round_trip_ms': [20],
+        'event_round_trip_ms': [40, 60],
+    }
+    canvas._handle_message(canvas, {'type': 'draw', 'timings': timings}, [])
+    canvas._handle_message(canvas, {'type': 'draw', 'timings': {}}, [])
+    canvas._handle_message(canvas, {'type': 'refresh'}, [])
+
+    stats = canvas.stats
+    assert stats['events'] == {'draw': 2, 'refresh': 1}
+    assert stats['decode_ms'] == {'count': 2, 'mean': 2.0, 'max': 3.0, 'last': 3.0}
+    assert stats['round_trip_ms']['mean'] == 20
+    assert stats['event_round_trip_ms']['mean'] == 50
+
+    assert 'round trip 20.0 ms' in connection_info()
@@ -0,0 +1,107 @@
+"""Tests for encoding the frames in a background thread."""
+
+import asyncio
+import io
+import threading
+import time
+from unittest.mock import patch
+
+import numpy as np
+from PIL import Image
+
+from ipympl import backend_nbagg
+
+
+def test_frames_sent_in_order(make_canvas):
+    """Frames encoded in the background are sent in the order they were drawn."""
+    canvas = make_canvas(headless=False, threaded_encoding=True)
+    encode_tiles = backend_nbagg._encode_tiles
+    threads = []
+
+    def slow_first_frame(tiles, *args):
+        threads.append(threading.current_thread())
+        if len(threads) == 1:
+            time.sleep(0.2)
+        return encode_tiles(tiles, *args)
+
+    async def draw_frames():
+        expected = []
+        for i in range(3):
+            canvas.figure.axes[0].set_title(f'Frame {i}')
+            canvas._force_full = True
+            canvas.draw()
+            expected.append(canvas._last_buff.copy())
+        # Nothing is sent until the frames are encoded
+        assert canvas.send.call_count == 0
+
+        while canvas.send.call_count < 3:
+            await asyncio.sleep(0.01)
+        return expected
+
+    with patch.object(backend_nbagg, '_encode_tiles', slow_first_frame):
+        expected = asyncio.run(draw_frames())
+
+    assert threading.main_thread() not in threads
+    for call_args, buff in zip(canvas.send.call_args_list, expected):
+        assert call_args[0][0]['mode'] == 'full'
+        image = Image.open(io.BytesIO(call_args[1]['buffers'][0]))
+        assert (np.asarray(image) == buff.view(np.uint8).reshape(*buff.shape, 4)).all()
+
+    assert canvas.frame_stats()['sent'] == 3
+
+
+def test_encoded_synchronously_without_event_loop(make_canvas):
+    """Without a running event loop the frames are sent right away."""
+    canvas = make_canvas(headless=False, threaded_encoding=True)
+
+    canvas.draw()
+    assert canvas.send.call_count == 1
+
+
+class _FrontEnd:
+    """Requests frames as the front-end does, ignoring the draw requests
+    received while it waits for a frame."""
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.waiting_for_image = False
+        canvas.send = self.send
+
+    def send(self, content, buffers=None):
+        batch = content['messages'] if content['type'] == 'batch' else [content]
+        for msg in batch:
+            if msg['type'] == 'binary':
+                self.waiting_for_image = False
+            elif msg['type'] == 'draw' and not self.waiting_for_image:
+                self.waiting_for_image = True
+                asyncio.get_running_loop().call_soon(
+                    self.canvas._handle_message, self.canvas, {'type': 'draw'}, []
+                )
+
+
+def test_draw_requests_while_encoding(make_canvas):
+    """Changes made while a frame is encoded are drawn once it is sent."""
+    canvas = make_canvas(headless=False, threaded_encoding=True)
+    frontend = _FrontEnd(canvas)
+    (line,) = canvas.figure.axes[0].lines
+    encode_tiles = backend_nbagg._encode_tiles
+
+    def slow_encode(tiles, *args):
+        time.sleep(0.02)
+        return encode_tiles(tiles, *args)
+
+    async def update():
+        for i in range(20):
+            line.set_ydata([1, 4, i])
+            canvas.draw_idle()
+            await asyncio.sleep(0.005)
+        while frontend.waiting_for_image or canvas._pending_frames:
+            await asyncio.sleep(0.01)
+
+    with patch.object(backend_nbagg, '_encode_tiles', slow_encode):
+        asyncio.run(asyncio.wait_for(update(), 10))
+
+    assert canvas.frame_stats()['sent'] > 2
+    # The last change was drawn and sent
+    assert not canvas.figure.stale
+    assert not canvas._draw_requested